@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from context_service import ContextIndex, ContextService
 from glossary_service import GlossaryService
@@ -14,6 +15,8 @@ from project_manager import ProjectInfo, ProjectManager
 from services import NoteService, SearchService
 from storage import NoteStorage
 
+_RESPONSE_CACHE_SIZE = 8
+
 
 @dataclass
 class ProjectServices:
@@ -32,6 +35,10 @@ class GrimoireAppState:
         self._lock = threading.RLock()
         self.project_manager = project_manager or ProjectManager()
         self._services: Optional[ProjectServices] = None
+        # Serialized read responses keyed by (endpoint, project root, revision).
+        # A key only hits while the revision it was built at is still current.
+        self._responses: OrderedDict[tuple, bytes] = OrderedDict()
+        self._responses_lock = threading.Lock()
         self._load_project(self.project_manager.active_project())
 
     def current(self) -> ProjectServices:
@@ -53,8 +60,37 @@ class GrimoireAppState:
             assert self._services is not None
             return self._services
 
+    def cached_response(self, key: tuple, build: Callable[[], bytes]) -> bytes:
+        """Return the serialized body for `key`, building it on a miss."""
+        with self._responses_lock:
+            body = self._responses.get(key)
+            if body is not None:
+                self._responses.move_to_end(key)
+                return body
+        body = build()
+        with self._responses_lock:
+            self._responses[key] = body
+            while len(self._responses) > _RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return body
+
+    def flush(self) -> None:
+        """Persist any buffered index writes and note fsyncs for the open project."""
+        with self._lock:
+            if self._services is not None:
+                self._services.search.flush()
+                self._services.storage.sync()
+
     def _load_project(self, project: ProjectInfo) -> None:
         project = self.project_manager.ensure_layout(project)
+        if self._services is not None:
+            self._services.search.flush()
+            self._services.storage.sync()
+
+        # Revisions restart at zero for the new services; drop bodies built
+        # from the previous ones.
+        with self._responses_lock:
+            self._responses.clear()
 
         storage = NoteStorage(root=project.notes_dir)
         indexer = Indexer(
@@ -11,7 +11,8 @@ It uses corpus-internal concept statistics + retrieval + redundancy control.
 from __future__ import annotations
 
 import hashlib
-import json
+import heapq
+import logging
 import os
 import re
 import math
@@ -22,8 +23,12 @@ from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 import numpy as np
 
 from context_models import ContextRequest, ContextSnippetPayload, WarmupResponsePayload
+from hashing import content_key
+from jsonio import read_json, replace_atomically, write_json
 from models import NoteKind, NoteRecord
 
+logger = logging.getLogger(__name__)
+
 
 def _resolve_hf_snapshot(model_name_or_path: str) -> str:
     """Resolve a HF model id to a local snapshot path (no network).
@@ -78,17 +83,28 @@ def _configure_torch_threads():
         torch.set_num_threads(threads)
         torch.set_num_interop_threads(interop)
     except Exception as exc:
-        print(f"context_service: torch thread config skipped: {exc}")
+        logger.info("Torch thread config skipped: %s", exc)
 
 
-def _normalize_dense(vec: Sequence[float]) -> np.ndarray:
-    arr = np.asarray(vec, dtype=np.float32)
+def _normalize_dense(vec: Optional[Sequence[float]]) -> np.ndarray:
+    arr = np.asarray(vec if vec is not None else [], dtype=np.float32)
     norm = float(np.linalg.norm(arr))
     if norm <= 0:
         return arr
     return arr / norm
 
 
+def _dense_array(vec) -> Optional[np.ndarray]:
+    """Hold a chunk vector as a float32 array rather than a list of Python floats.
+
+    A list costs a pointer plus a boxed float per dimension (~32 bytes); the
+    array is 4 bytes per dimension and orjson writes it back out as a list.
+    """
+    if vec is None or len(vec) == 0:
+        return None
+    return np.asarray(vec, dtype=np.float32)
+
+
 def _dot(a: np.ndarray, b: np.ndarray) -> float:
     if a.size == 0 or b.size == 0:
         return 0.0
@@ -904,25 +920,36 @@ class ContextEmbedder:
             self._dim = int(vec.shape[0])
 
     def encode_dense(self, text: str) -> np.ndarray:
-        text = text.strip()
+        return self.encode_dense_batch([text])[0]
+
+    def encode_dense_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode texts in one model call; returns an (N, dim) float32 array.
+
+        Blank texts get zero vectors without going through the model.
+        """
+        stripped = [text.strip() for text in texts]
         self._load()
         if self._model is None:
             raise RuntimeError("ContextEmbedder model is unavailable.")
-        if not text:
-            return _normalize_dense([0.0] * self.embedding_dim())
+        out = np.zeros((len(stripped), self.embedding_dim()), dtype=np.float32)
+        rows = [i for i, text in enumerate(stripped) if text]
+        if not rows:
+            return out
+        batch = [stripped[i] for i in rows]
         try:
-            vec = self._model.encode(
-                [text],
+            vecs = self._model.encode(
+                batch,
                 convert_to_numpy=True,
                 normalize_embeddings=True,
                 show_progress_bar=False,
-            )[0]
-            return np.asarray(vec, dtype=np.float32)
+            )
+            out[rows] = np.asarray(vecs, dtype=np.float32)
         except TypeError:
-            vec = self._model.encode([text], convert_to_numpy=True, show_progress_bar=False)[0]
-            return _normalize_dense(vec)
+            vecs = self._model.encode(batch, convert_to_numpy=True, show_progress_bar=False)
+            out[rows] = [_normalize_dense(vec) for vec in vecs]
         except Exception as exc:
             raise RuntimeError(f"ContextEmbedder encoding failed: {exc}") from exc
+        return out
 
     def embedding_dim(self) -> int:
         self._load()
@@ -1040,6 +1067,7 @@ class ContextIndex:
         self._dense_dirty: bool = True
         self._dense_matrix: Optional[np.ndarray] = None  # shape: (n, d)
         self._dense_chunk_ids: List[str] = []
+        self._dense_row: Dict[str, int] = {}
         self._dense_note_ids: List[str] = []
         self._dense_dim: Optional[int] = None
         self._faiss_dirty: bool = True
@@ -1063,13 +1091,17 @@ class ContextIndex:
 
     def _load(self):
         if os.path.exists(self.metadata_path):
-            with open(self.metadata_path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
+            payload = read_json(self.metadata_path)
             self._chunk = payload.get("chunks", {}) or {}
+            vectors = self._load_vectors()
+            for chunk_id, meta in self._chunk.items():
+                # Older metadata keeps vectors inline; newer keeps them in the sidecar.
+                dense = meta.get("dense")
+                meta["dense"] = _dense_array(dense) if dense else vectors.get(chunk_id)
             self._chunk_int = payload.get("chunk_id_to_int", {}) or {}
             self._int_chunk = payload.get("int_to_chunk_id", {}) or {}
             self._concept_label = payload.get("concept_label", {}) or {}
-            print(f"Loaded context index metadata: {len(self._chunk)} chunks")
+            logger.info("Loaded context index metadata: %d chunks", len(self._chunk))
 
         self._rebuild_derived()
         self._dense_dirty = True
@@ -1086,7 +1118,7 @@ class ContextIndex:
         for chunk_id in sorted(self._chunk.keys()):
             meta = self._chunk.get(chunk_id) or {}
             dense = meta.get("dense")
-            if not dense:
+            if dense is None or len(dense) == 0:
                 continue
             vec = _normalize_dense(dense)
             if vec.size == 0:
@@ -1101,20 +1133,68 @@ class ContextIndex:
 
         self._dense_dim = dim
         self._dense_chunk_ids = chunk_ids
+        self._dense_row = {cid: row for row, cid in enumerate(chunk_ids)}
         self._dense_note_ids = note_ids
         self._dense_matrix = np.stack(vectors, axis=0) if vectors else None
         self._dense_dirty = False
 
+    @property
+    def vectors_path(self) -> str:
+        return os.path.splitext(self.metadata_path)[0] + ".vectors.npz"
+
+    def _load_vectors(self) -> Dict[str, np.ndarray]:
+        """Read the dense sidecar: one float32 matrix plus the chunk id of each row.
+
+        Parsing one binary matrix is far cheaper on a cold start than decoding
+        every vector from JSON text, and the rows share one allocation.
+        """
+        try:
+            with np.load(self.vectors_path, allow_pickle=False) as data:
+                ids = data["ids"].tolist()
+                matrix = np.asarray(data["vectors"], dtype=np.float32)
+        except FileNotFoundError:
+            return {}
+        except Exception as exc:
+            logger.warning("Ignoring unreadable context vectors %s: %s", self.vectors_path, exc)
+            return {}
+        if len(ids) != int(matrix.shape[0]):
+            return {}
+        return {chunk_id: matrix[row] for row, chunk_id in enumerate(ids)}
+
+    def _save_vectors(self) -> bool:
+        """Write dense vectors to the sidecar; False if they cannot share one matrix."""
+        ids = [cid for cid, meta in self._chunk.items() if meta.get("dense") is not None]
+        if ids:
+            dims = {len(self._chunk[cid]["dense"]) for cid in ids}
+            if len(dims) != 1:
+                return False
+            matrix = np.stack([self._chunk[cid]["dense"] for cid in ids]).astype(np.float32)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+
+        def write(tmp_path: str) -> None:
+            with open(tmp_path, "wb") as handle:
+                np.savez(handle, ids=np.array(ids, dtype=str), vectors=matrix)
+
+        replace_atomically(self.vectors_path, write)
+        return True
+
     def _save_metadata(self):
-        os.makedirs(os.path.dirname(self.metadata_path), exist_ok=True)
+        chunks = self._chunk
+        if self._save_vectors():
+            chunks = {
+                cid: {key: value for key, value in meta.items() if key != "dense"}
+                for cid, meta in self._chunk.items()
+            }
         payload = {
-            "chunks": self._chunk,
+            "chunks": chunks,
             "chunk_id_to_int": self._chunk_int,
             "int_to_chunk_id": self._int_chunk,
             "concept_label": self._concept_label,
         }
-        with open(self.metadata_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f)
+        replace_atomically(
+            self.metadata_path, lambda tmp_path: write_json(tmp_path, payload, indent=False)
+        )
 
     def _rebuild_derived(self):
         self._concept_chunks = {}
@@ -1203,6 +1283,7 @@ class ContextIndex:
         for meta in chunks:
             chunk_id = meta["chunk_id"]
             int_id = self._ensure_chunk_int(chunk_id)
+            meta["dense"] = _dense_array(meta.get("dense"))
             self._chunk[chunk_id] = meta
 
             for concept_id, label in (meta.get("concept_labels") or {}).items():
@@ -1261,6 +1342,7 @@ class ContextIndex:
         self._rebuild_derived()
         self._dense_matrix = None
         self._dense_chunk_ids = []
+        self._dense_row = {}
         self._dense_note_ids = []
         self._dense_dim = None
         self._dense_dirty = True
@@ -1270,10 +1352,9 @@ class ContextIndex:
         self._note_prefix_dirty = True
         self._note_prefix_sum = {}
         self._note_prefix_count = {}
-        if os.path.exists(self.metadata_path):
-            os.remove(self.metadata_path)
-        if os.path.exists(self.faiss_path):
-            os.remove(self.faiss_path)
+        for path in (self.metadata_path, self.vectors_path, self.faiss_path):
+            if os.path.exists(path):
+                os.remove(path)
 
     def _load_faiss(self):
         if not os.path.exists(self.faiss_path):
@@ -1298,8 +1379,9 @@ class ContextIndex:
             raise RuntimeError(f"FAISS is required for semantic context: {exc}") from exc
 
         try:
-            os.makedirs(os.path.dirname(self.faiss_path), exist_ok=True)
-            faiss.write_index(self._faiss_index, self.faiss_path)
+            replace_atomically(
+                self.faiss_path, lambda tmp_path: faiss.write_index(self._faiss_index, tmp_path)
+            )
         except Exception as exc:
             raise RuntimeError(f"Failed to save FAISS context index: {exc}") from exc
 
@@ -1417,7 +1499,7 @@ class ContextIndex:
             return int(self._dense_dim)
         for meta in self._chunk.values():
             dense = meta.get("dense")
-            if dense:
+            if dense is not None and len(dense):
                 try:
                     return int(len(dense))
                 except Exception:
@@ -1465,6 +1547,28 @@ class ContextIndex:
                 break
         return results
 
+    def note_vectors(self, note_id: str, dim: int) -> Dict[str, np.ndarray]:
+        """Map chunk text to its stored dense vector for one note's chunks."""
+        vectors: Dict[str, np.ndarray] = {}
+        for meta in self._chunk.values():
+            if meta.get("note_id") != note_id:
+                continue
+            dense = meta.get("dense")
+            if dense is not None and len(dense) == dim:
+                vectors[str(meta.get("text") or "")] = dense
+        return vectors
+
+    def dense_vectors(self, chunk_ids: Sequence[str]) -> Tuple[List[str], Optional[np.ndarray]]:
+        """Return the ids among `chunk_ids` that have a dense vector, and their
+        unit vectors stacked as rows, so callers can score them in one matmul."""
+        if self._dense_dirty or self._dense_matrix is None:
+            self._rebuild_dense_cache()
+        if self._dense_matrix is None:
+            return [], None
+        found = [cid for cid in chunk_ids if cid in self._dense_row]
+        rows = [self._dense_row[cid] for cid in found]
+        return found, self._dense_matrix[rows]
+
     def sparse_search(
         self, query_sparse: Dict[str, float], exclude_note_id: Optional[str] = None, top_k: int = 20
     ) -> List[Tuple[str, float]]:
@@ -1564,7 +1668,7 @@ class ContextIndex:
         for chunk_id, meta in self._chunk.items():
             note_id = str(meta.get("note_id") or "")
             dense = meta.get("dense")
-            if not note_id or not dense:
+            if not note_id or dense is None or len(dense) == 0:
                 continue
             try:
                 idx = int(str(chunk_id).split(":")[-1])
@@ -1612,7 +1716,7 @@ class ContextIndex:
             meta = self._chunk.get(chunk_id)
             if not meta:
                 continue
-            vec = _normalize_dense(meta.get("dense") or [])
+            vec = _normalize_dense(meta.get("dense"))
             if vec.size == 0:
                 continue
             if expected_dim is not None and int(vec.shape[0]) != int(expected_dim):
@@ -1670,13 +1774,16 @@ class ContextService:
         self._current_dim = int(self.embedder.embedding_dim())
         return self._current_dim
 
-    def index_note(self, record: NoteRecord) -> int:
-        if record.kind != NoteKind.NOTE:
+    def index_note(self, record: NoteRecord, vectors_from: Optional[str] = None) -> int:
+        """Index `record`, reusing vectors stored for `vectors_from` (default: itself)."""
+        if record.kind is not NoteKind.NOTE:
             return 0
         current_dim = self._current_embedding_dim()
         existing_dim = self.index.embedding_dim_guess()
         if existing_dim is not None and existing_dim != current_dim:
-            print(f"ContextService: stale context index dim {existing_dim} != {current_dim}; clearing")
+            logger.warning(
+                "Stale context index dim %s != %s; clearing", existing_dim, current_dim
+            )
             self.index.clear()
 
         cleaned = record.content
@@ -1687,13 +1794,19 @@ class ContextService:
             self.index.delete_notes([record.id])
             return 0
 
-        blocks = chunk_blocks(cleaned)
+        blocks = [
+            (idx, block) for idx, block in enumerate(chunk_blocks(cleaned)) if block.text.strip()
+        ]
+        # Blocks whose text is unchanged since the last save keep their stored
+        # vectors; the rest go through one forward pass together.
+        known = self.index.note_vectors(vectors_from or record.id, current_dim)
+        missing = list(dict.fromkeys(b.text for _, b in blocks if b.text not in known))
+        if missing:
+            known.update(zip(missing, self.embedder.encode_dense_batch(missing)))
+        dense_rows = [known[block.text] for _, block in blocks]
         metas: List[Dict] = []
-        for idx, block in enumerate(blocks):
-            if not block.text.strip():
-                continue
+        for (idx, block), dense in zip(blocks, dense_rows):
             chunk_id = f"{record.id}:{block.start}:{block.end}:{idx}"
-            dense = self.embedder.encode_dense(block.text)
             concepts = extract_concept_candidates(block.text)
             concept_ids: List[str] = []
             concept_labels: Dict[str, str] = {}
@@ -1712,7 +1825,7 @@ class ContextService:
                     "end": block.end,
                     "text": block.text,
                     "quality": _chunk_quality_score(block.text),
-                    "dense": dense.tolist(),
+                    "dense": dense,
                     # Lexical retrieval is handled via BM25 built from chunk text.
                     # Keep the legacy field for backwards compatibility with older metadata.
                     "sparse": {},
@@ -1727,11 +1840,17 @@ class ContextService:
     def delete_notes(self, note_ids: Iterable[str]):
         self.index.delete_notes(note_ids)
 
+    def rename_note(self, old_id: str, record: NoteRecord) -> int:
+        """Move a note's context entries from `old_id` to `record.id` without re-embedding."""
+        count = self.index_note(record, vectors_from=old_id)
+        self.index.delete_notes([old_id])
+        return count
+
     def rebuild(self, records: Iterable[NoteRecord]) -> int:
         self.index.clear()
         processed = 0
         for record in records:
-            if record.kind != NoteKind.NOTE:
+            if record.kind is not NoteKind.NOTE:
                 continue
             if not record.content.strip():
                 continue
@@ -1752,7 +1871,9 @@ class ContextService:
             return True
 
         if self.index.chunk_count() > 0 and existing_dim is not None and existing_dim != current_dim:
-            print(f"ContextService: rebuilding context index due to dim change {existing_dim}->{current_dim}")
+            logger.warning(
+                "Rebuilding context index due to dim change %s->%s", existing_dim, current_dim
+            )
             self.index.clear()
 
         if self._autobuild_dim == current_dim:
@@ -1807,12 +1928,65 @@ class ContextService:
             return None
         return meta
 
+    def _candidate_similarities(
+        self,
+        candidate_ids: Sequence[str],
+        query_vec: np.ndarray,
+        gap_list: Sequence[str],
+        prefix_vec: Optional[np.ndarray],
+    ) -> Dict[str, Tuple[float, float, Optional[str], float]]:
+        """Score every candidate against the query, gap centroids, and prefix at once.
+
+        Returns `cid -> (relevance, gap_support, gap_best, redundancy)` for the
+        candidates that have a dense vector; one matrix product per signal
+        replaces a Python-level dot product per candidate and gap.
+        """
+        ids, mat = self.index.dense_vectors(candidate_ids)
+        if mat is None or not ids:
+            return {}
+        # Stored vectors from an earlier model (e.g. a stale sidecar after a
+        # model switch) cannot be compared with the query; score nothing.
+        if mat.shape[1] != query_vec.shape[0]:
+            return {}
+
+        rel = mat @ query_vec.astype(np.float32)
+
+        gap_support = np.zeros(len(ids), dtype=np.float32)
+        gap_best: List[Optional[str]] = [None] * len(ids)
+        gap_ids: List[str] = []
+        centroids: List[np.ndarray] = []
+        for gap_id in gap_list:
+            centroid = self.index.concept_centroid(gap_id)
+            if centroid is not None and centroid.shape[0] == mat.shape[1]:
+                gap_ids.append(gap_id)
+                centroids.append(centroid)
+        if centroids:
+            gap_scores = mat @ np.stack(centroids, axis=0).astype(np.float32).T
+            best = np.argmax(gap_scores, axis=1)
+            best_scores = gap_scores[np.arange(len(ids)), best]
+            # Only gaps with positive similarity count, as with a 0.0 running max.
+            positive = best_scores > 0.0
+            gap_support = np.where(positive, best_scores, 0.0)
+            gap_best = [gap_ids[b] if p else None for b, p in zip(best.tolist(), positive.tolist())]
+
+        if prefix_vec is not None and prefix_vec.size == mat.shape[1]:
+            redundancy = (mat @ prefix_vec.astype(np.float32)).tolist()
+        else:
+            redundancy = [0.0] * len(ids)
+
+        return {
+            cid: (float(r), float(g), b, float(red))
+            for cid, r, g, b, red in zip(
+                ids, rel.tolist(), gap_support.tolist(), gap_best, redundancy
+            )
+        }
+
     def _combine_sparse(self, sparse_dicts: Sequence[Dict[str, float]], max_terms: int = 64) -> Dict[str, float]:
         merged: Dict[str, float] = {}
         for sd in sparse_dicts:
             for token, weight in (sd or {}).items():
                 merged[token] = merged.get(token, 0.0) + float(weight)
-        items = sorted(merged.items(), key=lambda kv: (-kv[1], kv[0]))[:max_terms]
+        items = heapq.nsmallest(max_terms, merged.items(), key=lambda kv: (-kv[1], kv[0]))
         return {k: float(v) for k, v in items}
 
     def _clip_tokens_around_cursor(self, text: str, cursor_char: int, max_tokens: int = 450) -> str:
@@ -1843,11 +2017,11 @@ class ContextService:
         if start_i + 1 == end_i and start_i >= 0 and start_i < len(blocks):
             meta = self._indexed_block_meta(note_id, blocks[start_i], start_i)
             if meta:
-                vec = _normalize_dense(meta.get("dense") or [])
+                vec = _normalize_dense(meta.get("dense"))
                 return vec, {}
 
         # Fallback: encode dynamically (e.g., unsaved edits). Cache per paragraph hash.
-        w_hash = hashlib.sha1(window_text.encode("utf-8")).hexdigest()[:12]
+        w_hash = content_key(window_text)
         key = (note_id, start_i, w_hash)
         cached = self._window_embed_cache.get(key)
         if cached is not None:
@@ -1888,7 +2062,7 @@ class ContextService:
             return None
         meta = self._indexed_block_meta(note_id, blocks[block_index + 1], block_index + 1)
         if meta:
-            vec = _normalize_dense(meta.get("dense") or [])
+            vec = _normalize_dense(meta.get("dense"))
             return vec if vec.size > 0 else None
         if not suffix_text.strip():
             return None
@@ -1978,7 +2152,7 @@ class ContextService:
 
         # Cache at paragraph-level, invalidated when paragraph text changes.
         current_block = blocks[block_index]
-        block_hash = hashlib.sha1((current_block.text or "").encode("utf-8")).hexdigest()[:12]
+        block_hash = content_key(current_block.text)
         cache_key = (request.note_id, block_index, block_hash)
         if self._cache_key == cache_key:
             return self._cache_value[:limit]
@@ -2132,6 +2306,9 @@ class ContextService:
         current_chunk_id = f"{request.note_id}:{current_block.start}:{current_block.end}:{block_index}"
         gap_list = sorted(gaps)
         cross_note_penalty = float(os.environ.get("GRIMOIRE_CROSS_NOTE_PENALTY", "0.06"))
+        similarities = self._candidate_similarities(
+            sorted(candidate_ids), query_vec, gap_list, prefix_vec
+        )
         for cid in sorted(candidate_ids):
             # Avoid echoing what the user is currently reading.
             if cid == current_chunk_id:
@@ -2153,27 +2330,16 @@ class ContextService:
                 )
             if min_quality and float(quality) < min_quality:
                 continue
-            vec = _normalize_dense(meta.get("dense") or [])
-            if vec.size == 0 or int(vec.shape[0]) != int(window_vec.shape[0]):
+            if cid not in similarities:
                 continue
-            rel = _dot(vec, query_vec)
+            rel, gap_support, gap_best, redundancy = similarities[cid]
 
-            gap_support = 0.0
-            gap_best: Optional[str] = None
             meta_concepts = set(meta.get("concepts", []) or [])
             active_overlap = len(meta_concepts & active_ids)
             gap_overlap = len(meta_concepts & gaps)
             active_ratio = float(active_overlap) / float(max(1, len(active_ids))) if active_ids else 0.0
             gap_ratio = float(gap_overlap) / float(max(1, len(gaps))) if gaps else 0.0
             mentions_gap = gap_overlap > 0
-            for gap_id in gap_list:
-                centroid = self.index.concept_centroid(gap_id)
-                if centroid is None:
-                    continue
-                val = _dot(vec, centroid)
-                if val > gap_support:
-                    gap_support = val
-                    gap_best = gap_id
 
             bm25_norm = float(bm25_norms.get(cid, 0.0)) if bm25_norms else 0.0
             lex_overlap = 0.0
@@ -2214,7 +2380,6 @@ class ContextService:
                     or (min_cross_rel and rel >= min_cross_rel)
                 ):
                     continue
-            redundancy = _dot(vec, prefix_vec) if prefix_vec is not None else 0.0
             redundancy_penalty = float(lambd) * float(redundancy)
             # If a candidate is lexically on-topic for the current cursor window,
             # prefer relevance over "don't repeat what the reader already saw".
@@ -2262,9 +2427,8 @@ class ContextService:
             }
             scored.append((cid, base, debug))
 
-        scored.sort(key=lambda t: (-t[1], t[0]))
-        if len(scored) > max_candidates:
-            scored = scored[:max_candidates]
+        # Partial sort: only the top max_candidates survive to reranking.
+        scored = heapq.nsmallest(max_candidates, scored, key=lambda t: (-t[1], t[0]))
 
         # Step 6: rerank top-K (handled inside apply_reranker).
         scored = self._apply_reranker(window, scored)
@@ -2287,7 +2451,7 @@ class ContextService:
                 meta = self.index.get_chunk(cid)
                 if not meta:
                     continue
-                vec = _normalize_dense(meta.get("dense") or [])
+                vec = _normalize_dense(meta.get("dense"))
                 max_red = 0.0
                 for svec in selected_vecs:
                     max_red = max(max_red, _dot(vec, svec))
@@ -2308,7 +2472,7 @@ class ContextService:
             if not meta:
                 continue
 
-            vec = _normalize_dense(meta.get("dense") or [])
+            vec = _normalize_dense(meta.get("dense"))
             selected_vecs.append(vec)
             covered_gaps |= (set(meta.get("concepts", []) or []) & gaps)
             if meta.get("note_id"):
@@ -4,11 +4,14 @@ Embedding module for Grimoire.
 Uses sentence-transformers to convert text chunks into vector embeddings.
 """
 
+import logging
 import os
 from typing import List, Optional
 
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 
 class Embedder:
     """Handles text embedding using sentence-transformers."""
@@ -30,7 +33,7 @@ class Embedder:
         if self.model is not None:
             return
         try:
-            print(f"Attempting to load sentence-transformers model: {self.model_name}")
+            logger.info("Loading sentence-transformers model: %s", self.model_name)
             from sentence_transformers import SentenceTransformer
         except ImportError as e:
             raise RuntimeError(
@@ -45,9 +48,7 @@ class Embedder:
             self.model = SentenceTransformer(resolved)
             test_embedding = self.model.encode(["test"])
             self.embedding_dim = test_embedding.shape[1]
-            print(
-                f"✓ Model loaded successfully. Embedding dimension: {self.embedding_dim}"
-            )
+            logger.info("Model loaded. Embedding dimension: %d", self.embedding_dim)
         except Exception as e:
             raise RuntimeError(
                 f"Failed to load sentence-transformers model '{self.model_name}': {e}"
@@ -93,7 +94,7 @@ class Embedder:
         # Filter out empty texts
         valid_texts = [text for text in texts if text and text.strip()]
         if not valid_texts:
-            return [[] for _ in texts]
+            return [[0.0] * self.embedding_dim for _ in texts]
 
         try:
             embeddings = self.model.encode(valid_texts, convert_to_numpy=True)
@@ -180,7 +181,7 @@ class Embedder:
             # Save as numpy array
             np_embeddings = np.array(embeddings)
             np.save(filepath, np_embeddings)
-            print(f"Saved {len(embeddings)} embeddings to {filepath}")
+            logger.info("Saved %d embeddings to %s", len(embeddings), filepath)
         except Exception as e:
             raise RuntimeError(f"Failed to save embeddings: {str(e)}")
 
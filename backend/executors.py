@@ -0,0 +1,47 @@
+"""Shared executors for blocking backend work."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _embed_pool_size() -> int:
+    raw = os.environ.get("GRIMOIRE_EMBED_WORKERS", "").strip()
+    if raw:
+        return max(1, int(raw))
+    return os.cpu_count() or 1
+
+
+EMBED_WORKERS = _embed_pool_size()
+
+# Embedding/index work is CPU-bound; keep it off the event loop and out of the
+# default to_thread pool so health checks and tree reads stay responsive.
+EMBED_POOL = ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="grimoire-embed")
+
+
+def _io_pool_size() -> int:
+    return max(1, int(os.environ.get("GRIMOIRE_IO_WORKERS", "4")))
+
+
+# Attachment reads and writes are short and disk-bound. A small pool of their
+# own keeps them from queueing behind tree builds in the default pool, and a
+# burst of uploads from crowding out everything else.
+IO_POOL = ThreadPoolExecutor(max_workers=_io_pool_size(), thread_name_prefix="grimoire-io")
+
+
+async def run_in_embed_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EMBED_POOL, functools.partial(func, *args))
+
+
+async def run_in_io_pool(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(IO_POOL, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    EMBED_POOL.shutdown(wait=False)
+    IO_POOL.shutdown(wait=False)
@@ -14,8 +14,6 @@ Models used (local):
 
 from __future__ import annotations
 
-import hashlib
-import json
 import os
 import re
 import threading
@@ -37,6 +35,8 @@ from context_service import (
     _sentences_excerpt,
     split_blocks,
 )
+from hashing import content_key
+from jsonio import read_json, replace_atomically, write_json
 from models import NoteKind
 from storage import NoteStorage
 
@@ -66,10 +66,6 @@ def _clean_note_text(text: str) -> str:
     return cleaned
 
 
-def _sha1(text: str) -> str:
-    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
-
-
 _CODE_FENCE_RE = re.compile(r"(?s)```.*?```")
 
 
@@ -959,6 +955,7 @@ class GlossaryService:
         *,
         embedder: Optional[ContextEmbedder] = None,
         reranker: Optional[ContextReranker] = None,
+        update_delay: Optional[float] = None,
     ):
         self.path = Path(path)
         self.index = index
@@ -968,8 +965,16 @@ class GlossaryService:
         self.path.parent.mkdir(parents=True, exist_ok=True)
 
         self._lock = threading.RLock()
+        # Held for a whole save so a later snapshot is never replaced on disk
+        # by an earlier one still being written.
+        self._save_lock = threading.Lock()
         self._update_thread: Optional[threading.Thread] = None
         self._pending_note_updates: Set[str] = set()
+        # Seconds the update thread waits before each pass so a burst of
+        # autosaves is extracted and recomputed once, not once per save.
+        if update_delay is None:
+            update_delay = float(os.environ.get("GRIMOIRE_GLOSSARY_UPDATE_DELAY", "1.0"))
+        self.update_delay = max(0.0, update_delay)
 
         # Legacy fields kept for backwards compatibility with older serialized payloads.
         self._note_concepts: Dict[str, Set[str]] = {}
@@ -984,6 +989,8 @@ class GlossaryService:
         self._last_extract_spacy_available: bool = False
         self.last_build_spacy_notes: int = 0
         self.last_build_fallback_notes: int = 0
+        # Bumped whenever `_entries` is recomputed so readers can cache listings.
+        self.revision = 0
         self._load()
 
     # ------------------------------------------------------------------
@@ -1034,12 +1041,12 @@ class GlossaryService:
         self.last_build_spacy_notes = 0
         self.last_build_fallback_notes = 0
         for record in records:
-            if record.kind != NoteKind.NOTE:
+            if record.kind is not NoteKind.NOTE:
                 continue
             cleaned = _clean_note_text(record.content)
             if not cleaned.strip():
                 continue
-            note_hash = _sha1(cleaned)
+            note_hash = content_key(cleaned)
             extracted = self._extract_note(record.id, cleaned, note_hash)
             if extracted is not None:
                 next_notes[record.id] = extracted
@@ -1062,11 +1069,16 @@ class GlossaryService:
     def _run_pending_updates(self) -> None:
         # Consume queued note ids; collapse multiple updates into one recompute.
         while True:
+            if self.update_delay:
+                time.sleep(self.update_delay)
             with self._lock:
                 pending = sorted(self._pending_note_updates)
                 self._pending_note_updates.clear()
-            if not pending:
-                return
+                if not pending:
+                    # Retire under the lock so update_for_note never counts
+                    # on a thread that has already decided to exit.
+                    self._update_thread = None
+                    return
 
             changed = False
             for note_id in pending:
@@ -1079,7 +1091,7 @@ class GlossaryService:
                             changed = True
                     continue
 
-                if getattr(record, "kind", None) != NoteKind.NOTE:
+                if getattr(record, "kind", None) is not NoteKind.NOTE:
                     with self._lock:
                         if note_id in self._notes:
                             self._notes.pop(note_id, None)
@@ -1094,7 +1106,7 @@ class GlossaryService:
                             changed = True
                     continue
 
-                note_hash = _sha1(cleaned)
+                note_hash = content_key(cleaned)
                 with self._lock:
                     existing = self._notes.get(note_id)
                 if existing is not None and existing.text_hash == note_hash:
@@ -1134,6 +1146,7 @@ class GlossaryService:
         except Exception as exc:
             raise RuntimeError(f"Glossary: spaCy parse failed: {exc}") from exc
 
+        spans: List[Tuple[int, int, str, str, Optional[str]]] = []
         for sent in getattr(doc, "sents", []):
             start = int(getattr(sent, "start_char", 0))
             end = int(getattr(sent, "end_char", 0))
@@ -1147,8 +1160,12 @@ class GlossaryService:
             chunk_id = _chunk_id_for_offset(blocks_with_ids, start)
             if chunk_id is None:
                 continue
-            heading = _heading_for_offset(headings, start)
-            dense = embedder.encode_dense(raw).tolist()
+            spans.append((start, end, raw, chunk_id, _heading_for_offset(headings, start)))
+
+        # One model call for every sentence in the note.
+        vectors = embedder.encode_dense_batch([raw for _, _, raw, _, _ in spans]) if spans else []
+        for (start, end, raw, chunk_id, heading), vector in zip(spans, vectors):
+            dense = vector.tolist()
             sid = str(uuid.uuid5(_GLOSSARY_NAMESPACE, f"{note_id}:sent:{start}:{end}"))
             sentences.append(
                 SentenceRecord(
@@ -1879,6 +1896,7 @@ class GlossaryService:
             with self._lock:
                 self._entities = {}
                 self._entries = {}
+                self.revision += 1
             return
 
         # Build per-sentence mention lists for alias edges + co-occurrence.
@@ -2202,6 +2220,7 @@ class GlossaryService:
         with self._lock:
             self._entities = entities
             self._entries = entries
+            self.revision += 1
 
     # ------------------------------------------------------------------
     # Internals
@@ -2533,7 +2552,7 @@ class GlossaryService:
             # Embedding similarity to support centroid.
             emb = 0.0
             if centroid is not None:
-                vec = _normalize_dense(meta.get("dense") or [])
+                vec = _normalize_dense(meta.get("dense"))
                 if vec.size > 0 and int(vec.shape[0]) == int(centroid.shape[0]):
                     emb = float(_dot(vec, centroid))
 
@@ -2567,7 +2586,7 @@ class GlossaryService:
         try:
             if not self.path.exists():
                 return
-            payload = json.loads(self.path.read_text(encoding="utf-8"))
+            payload = read_json(self.path)
             version = int(payload.get("version") or 0)
 
             if version != _GLOSSARY_STORAGE_VERSION:
@@ -2670,6 +2689,10 @@ class GlossaryService:
             self._entities = {}
 
     def _save(self) -> None:
+        with self._save_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
         with self._lock:
             notes = self._notes
             entries = self._entries
@@ -2728,5 +2751,4 @@ class GlossaryService:
                 for cid, e in entries.items()
             },
         }
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        replace_atomically(self.path, lambda tmp_path: write_json(tmp_path, payload))
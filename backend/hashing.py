@@ -0,0 +1,15 @@
+"""Content hashing helpers for cache and change-detection keys."""
+
+from __future__ import annotations
+
+import hashlib
+
+
+def content_key(text: str) -> str:
+    """Return a short, stable digest of `text`.
+
+    blake2b with a 16-byte digest is faster than sha1/sha256 in CPython and is
+    ample for dedup and cache keys (it is not used for security).
+    """
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
@@ -4,13 +4,82 @@ Indexer module for Grimoire.
 Manages FAISS index for semantic search and chunk metadata storage.
 """
 
+import base64
 import copy
-import json
+import functools
+import logging
 import os
+import threading
+from collections import Counter
 from typing import Dict, List, Optional
 
 import numpy as np
 
+from executors import EMBED_WORKERS
+from jsonio import read_json, replace_atomically, write_json
+
+logger = logging.getLogger(__name__)
+
+# Below this many vectors an exact flat index is cheap enough, and a scalar
+# quantizer would be trained on too few samples to estimate value ranges well.
+_SQ8_MIN_TRAIN_VECTORS = 1024
+_SQ8_MAX_TRAIN_VECTORS = 10000
+# Past this size exhaustive search cost dominates, so rebuilds switch to an
+# HNSW graph (log-time search, small recall loss).
+_HNSW_MIN_VECTORS = 50000
+_HNSW_M = 32
+_HNSW_EF_CONSTRUCTION = 100
+_HNSW_EF_SEARCH = 64
+# A corpus keeps its larger layout until it shrinks this far below the
+# threshold that selected it, so one hovering at a threshold is not retrained
+# and rebuilt on every save or delete that crosses it.
+_LAYOUT_DOWNSIZE_FRACTION = 0.8
+# Removed chunks stay in the index as dead rows until they make up this share
+# of it; search excludes rows that no longer map to a chunk.
+_DEAD_ROW_FRACTION = 0.25
+
+
+def _synchronized(method):
+    """Run an Indexer method under the instance lock shared with `flush`.
+
+    Readers take it too: writers run on embed-pool threads alongside searches,
+    and delete metadata keys, renumber index positions, and swap `self.index`.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _pack_embedding(embedding) -> Dict:
+    """Store an embedding as int8 codes with a per-vector scale.
+
+    Metadata keeps every chunk's vector so the index can be rebuilt; as float
+    lists these dominate index.json and memory, while 8-bit codes (base64 in
+    JSON) are ~4x smaller than float32 and lose well under 1% recall.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    peak = float(np.abs(vector).max()) if vector.size else 0.0
+    scale = peak / 127.0 if peak else 1.0
+    codes = np.rint(vector / scale).astype(np.int8)
+    return {
+        "embedding_q8": base64.b64encode(codes.tobytes()).decode("ascii"),
+        "embedding_scale": scale,
+    }
+
+
+def _unpack_embedding(metadata: Dict) -> Optional[np.ndarray]:
+    """Return a chunk's stored vector as float32, or None if it has none."""
+    if metadata.get("embedding_q8") is not None:
+        codes = np.frombuffer(base64.b64decode(metadata["embedding_q8"]), dtype=np.int8)
+        return codes.astype(np.float32) * np.float32(metadata["embedding_scale"])
+    if metadata.get("embedding") is not None:
+        return np.asarray(metadata["embedding"], dtype=np.float32)
+    return None
+
 
 class Indexer:
     """Manages FAISS index and chunk metadata for semantic search."""
@@ -20,6 +89,11 @@ class Indexer:
         index_path: str = "storage/faiss.index",
         metadata_path: str = "storage/index.json",
         note_tree_path: str = "storage/note_tree.json",
+        quantize: Optional[bool] = None,
+        flush_delay: Optional[float] = None,
+        mmap: Optional[bool] = None,
+        search_threads: Optional[int] = None,
+        ingest_threads: Optional[int] = None,
     ):
         """
         Initialize the indexer.
@@ -28,10 +102,50 @@ class Indexer:
             index_path: Path to FAISS index file
             metadata_path: Path to chunk metadata JSON file
             note_tree_path: Path to note tree JSON file
+            quantize: Store vectors as 8-bit scalar-quantized codes once the
+                      corpus is large enough to train on. Defaults to
+                      `GRIMOIRE_SEARCH_SQ8` (enabled unless set to 0/false).
+            flush_delay: Seconds to coalesce writes before persisting to disk;
+                         0 writes synchronously. Defaults to
+                         `GRIMOIRE_SEARCH_FLUSH_DELAY` (2 seconds).
+            mmap: Map the saved index read-only on load instead of copying it
+                  into memory; it is copied on the first write. Defaults to
+                  `GRIMOIRE_SEARCH_MMAP` (enabled unless set to 0/false).
+            search_threads: OpenMP threads FAISS may use per search call.
+                            Defaults to `GRIMOIRE_FAISS_SEARCH_THREADS`, else the
+                            CPU count split across the embed pool's workers,
+                            which may all be searching at once.
+            ingest_threads: OpenMP threads for adds, training and rebuilds, kept
+                            low so indexing does not starve concurrent queries.
+                            Defaults to `GRIMOIRE_FAISS_INGEST_THREADS` (1).
         """
         self.index_path = index_path
         self.metadata_path = metadata_path
         self.note_tree_path = note_tree_path
+        if quantize is None:
+            flag = os.environ.get("GRIMOIRE_SEARCH_SQ8", "1").strip().lower()
+            quantize = flag not in ("0", "false", "no", "off")
+        self.quantize = quantize
+        if flush_delay is None:
+            flush_delay = float(os.environ.get("GRIMOIRE_SEARCH_FLUSH_DELAY", "2.0"))
+        self.flush_delay = max(0.0, flush_delay)
+        if mmap is None:
+            flag = os.environ.get("GRIMOIRE_SEARCH_MMAP", "1").strip().lower()
+            mmap = flag not in ("0", "false", "no", "off")
+        self.mmap = mmap
+        if search_threads is None:
+            raw = os.environ.get("GRIMOIRE_FAISS_SEARCH_THREADS", "").strip()
+            search_threads = int(raw) if raw else (os.cpu_count() or 1) // EMBED_WORKERS
+        self.search_threads = max(1, search_threads)
+        if ingest_threads is None:
+            ingest_threads = int(os.environ.get("GRIMOIRE_FAISS_INGEST_THREADS", "1"))
+        self.ingest_threads = max(1, ingest_threads)
+        self._index_mapped = False
+        self._lock = threading.RLock()
+        self._dirty = set()
+        self._flush_timer = None
+        self._position_lookup = None
+        self._live_rows = None
         self.index = None
         self.metadata = {}
         self.note_tree = {}
@@ -44,37 +158,39 @@ class Indexer:
     def _load_metadata(self):
         """Load chunk metadata from JSON file."""
         if os.path.exists(self.metadata_path):
-            with open(self.metadata_path, "r", encoding="utf-8") as f:
-                self.metadata = json.load(f)
-            print(f"Loaded metadata for {len(self.metadata)} chunks")
+            self.metadata = read_json(self.metadata_path)
+            logger.info("Loaded metadata for %d chunks", len(self.metadata))
         else:
             self.metadata = {}
-            print("No existing metadata found, starting fresh")
+            logger.info("No existing metadata found, starting fresh")
 
     def _save_metadata(self):
-        """Save chunk metadata to JSON file."""
-        os.makedirs(os.path.dirname(self.metadata_path), exist_ok=True)
-        with open(self.metadata_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
-        return True
+        """Schedule chunk metadata to be written to its JSON file."""
+        return self._mark_dirty("metadata")
+
+    def _write_metadata(self):
+        replace_atomically(
+            self.metadata_path, lambda tmp_path: write_json(tmp_path, self.metadata)
+        )
 
     def _load_note_tree(self):
         """Load note tree from JSON file."""
         if os.path.exists(self.note_tree_path):
-            with open(self.note_tree_path, "r", encoding="utf-8") as f:
-                self.note_tree = json.load(f)
-            print(f"Loaded note tree from {self.note_tree_path}")
+            self.note_tree = read_json(self.note_tree_path)
+            logger.info("Loaded note tree from %s", self.note_tree_path)
         else:
             self.note_tree = {}
-            print("No existing note tree found, starting fresh")
+            logger.info("No existing note tree found, starting fresh")
 
     def _save_note_tree(self):
-        """Save note tree to JSON file."""
-        os.makedirs(os.path.dirname(self.note_tree_path), exist_ok=True)
-        with open(self.note_tree_path, "w", encoding="utf-8") as f:
-            json.dump(self.note_tree, f, indent=2)
-        print(f"Saved note tree to {self.note_tree_path}")
-        return True
+        """Schedule the note tree to be written to its JSON file."""
+        return self._mark_dirty("note_tree")
+
+    def _write_note_tree(self):
+        replace_atomically(
+            self.note_tree_path, lambda tmp_path: write_json(tmp_path, self.note_tree)
+        )
+        logger.debug("Saved note tree to %s", self.note_tree_path)
 
     def _load_or_create_index(self):
         """Load existing FAISS index or create a new one."""
@@ -86,21 +202,63 @@ class Indexer:
             ) from exc
 
         if os.path.exists(self.index_path):
-            print(f"Loading FAISS index from {self.index_path}")
-            self.index = faiss.read_index(self.index_path)
-            print(f"Index loaded with {self.index.ntotal} vectors")
+            logger.info("Loading FAISS index from %s", self.index_path)
+            self.index = self._read_index(faiss)
+            logger.info("Index loaded with %d vectors", self.index.ntotal)
         else:
-            print("No existing FAISS index found, will create when needed")
+            logger.info("No existing FAISS index found, will create when needed")
             self.index = None
 
+    def _read_index(self, faiss):
+        """Read the saved index, memory-mapping its vectors when supported.
+
+        A mapped index starts serving immediately and is backed by the page
+        cache rather than a private copy; `_ensure_writable_index` swaps in an
+        owned copy before the first mutation.
+        """
+        flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+        if self.mmap and flag is not None:
+            try:
+                index = faiss.read_index(self.index_path, flag | faiss.IO_FLAG_READ_ONLY)
+                self._index_mapped = True
+                return index
+            except Exception as e:
+                logger.warning("Memory-mapped index load failed, reading into memory: %s", e)
+        self._index_mapped = False
+        return faiss.read_index(self.index_path)
+
+    def _ensure_writable_index(self):
+        """Replace a memory-mapped index with an owned copy before writing."""
+        if not self._index_mapped or self.index is None:
+            return
+        import faiss
+
+        # clone_index keeps the mapped view, so round-trip through a buffer.
+        self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        self._index_mapped = False
+
+    @staticmethod
+    def _use_threads(count: int) -> None:
+        """Set FAISS's OpenMP thread count for the calling thread.
+
+        The OpenMP setting is per OS thread, so it is applied right before each
+        FAISS call from whichever pool thread makes it.
+        """
+        try:
+            import faiss
+        except ImportError:
+            return
+        faiss.omp_set_num_threads(count)
+
     def _create_index(self, embedding_dim: int):
         """Create a new FAISS index with the given dimension."""
         try:
             import faiss
 
-            print(f"Creating new FAISS index with dimension {embedding_dim}")
+            logger.info("Creating new FAISS index with dimension %d", embedding_dim)
             # Use IndexFlatIP for cosine similarity (vectors should be normalized)
             self.index = faiss.IndexFlatIP(embedding_dim)
+            self._index_mapped = False
 
             # Save the empty index
             os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
@@ -113,13 +271,15 @@ class Indexer:
         except Exception as e:
             raise RuntimeError(f"Failed to create FAISS index: {e}")
 
+    @_synchronized
     def update_note(self, note_id: str, chunk_embeddings: List[Dict]):
         """
         Update a note in the index.
 
         Args:
             note_id: ID of the note
-            chunk_embeddings: List of dicts with chunk_id, text, and embedding
+            chunk_embeddings: List of dicts with chunk_id, text, and embedding,
+                              plus optional model and content_key
 
         Returns:
             bool: True if update was successful, False otherwise
@@ -130,20 +290,34 @@ class Indexer:
         if not chunk_embeddings:
             return True
 
-        # Add new chunks
+        # Store metadata
+        chunk_ids = []
         for chunk_data in chunk_embeddings:
             chunk_id = chunk_data["chunk_id"]
-
-            # Store metadata
-            self.metadata[chunk_id] = {
+            metadata = {
                 "note_id": note_id,
                 "chunk_id": chunk_id,
                 "text": chunk_data["text"],
-                "embedding": chunk_data["embedding"],
             }
+            if chunk_data.get("model"):
+                metadata["model"] = chunk_data["model"]
+            if chunk_data.get("content_key"):
+                metadata["content_key"] = chunk_data["content_key"]
+            if self.quantize:
+                metadata.update(_pack_embedding(chunk_data["embedding"]))
+            else:
+                metadata["embedding"] = chunk_data["embedding"]
+            self.metadata[chunk_id] = metadata
+            chunk_ids.append(chunk_id)
+
+        # Add to FAISS index in a single call
+        self._add_batch_to_index(
+            chunk_ids, [chunk_data["embedding"] for chunk_data in chunk_embeddings]
+        )
 
-            # Add to FAISS index
-            self._add_to_index(chunk_id, chunk_data["embedding"])
+        # Compact dead rows, or move a grown corpus to the next index layout.
+        if self._needs_rebuild():
+            self._rebuild_index()
 
         # Update note tree
         note_tree_saved = self._update_note_tree(note_id)
@@ -153,11 +327,13 @@ class Indexer:
         index_saved = self._save_index()
 
         if metadata_saved and index_saved and note_tree_saved:
-            print(f"Updated note: {note_id}")
+            logger.debug("Updated note: %s", note_id)
             return True
         else:
-            print(
-                f"Warning: Failed to save metadata, index, or note tree when updating note: {note_id}, but update was performed in memory"
+            logger.warning(
+                "Failed to save metadata, index, or note tree when updating note: %s, "
+                "but update was performed in memory",
+                note_id,
             )
             return False
 
@@ -170,13 +346,12 @@ class Indexer:
             if metadata["note_id"] == note_id:
                 chunks_to_remove.append(chunk_id)
 
-        # Remove from metadata
+        # Remove from metadata; their index rows become dead and are skipped
+        # by search until the next compaction.
         for chunk_id in chunks_to_remove:
             del self.metadata[chunk_id]
-
-        # Rebuild index if we have FAISS
-        if self.index and chunks_to_remove:
-            self._rebuild_index()
+        if chunks_to_remove:
+            self._position_lookup = None
 
     def _add_to_index(self, chunk_id: str, embedding: List[float]):
         """Add a single embedding to the FAISS index."""
@@ -184,6 +359,8 @@ class Indexer:
             # Create index with correct dimension
             self._create_index(len(embedding))
 
+        self._ensure_writable_index()
+
         # Convert to numpy array and reshape for FAISS
         embedding_np = np.array([embedding], dtype=np.float32)
 
@@ -193,9 +370,30 @@ class Indexer:
         # Store the index position in metadata
         if chunk_id in self.metadata:
             self.metadata[chunk_id]["index_position"] = self.index.ntotal - 1
+        self._position_lookup = None
+
+    def _add_batch_to_index(self, chunk_ids: List[str], embeddings: List[List[float]]):
+        """Add several embeddings to the FAISS index with one `add` call."""
+        if not chunk_ids:
+            return
+        if self.index is None:
+            self._create_index(len(embeddings[0]))
+
+        self._ensure_writable_index()
+
+        embeddings_np = np.ascontiguousarray(embeddings, dtype=np.float32)
+        start = self.index.ntotal
+        self._use_threads(self.ingest_threads)
+        self.index.add(embeddings_np)
+
+        for offset, chunk_id in enumerate(chunk_ids):
+            if chunk_id in self.metadata:
+                self.metadata[chunk_id]["index_position"] = start + offset
+        self._position_lookup = None
 
     def _rebuild_index(self):
         """Rebuild the FAISS index from current metadata."""
+        self._position_lookup = None
         if not self.metadata:
             self.index = None
             return
@@ -203,64 +401,189 @@ class Indexer:
         # Filter metadata to only include entries with embeddings
         valid_metadata = {}
         for chunk_id, metadata in self.metadata.items():
-            if "embedding" in metadata and metadata["embedding"] is not None:
-                valid_metadata[chunk_id] = metadata
+            embedding = _unpack_embedding(metadata)
+            if embedding is not None:
+                valid_metadata[chunk_id] = (metadata, embedding)
             else:
-                print(
-                    f"Warning: Metadata for chunk {chunk_id} has no embedding, skipping"
+                logger.warning(
+                    "Metadata for chunk %s has no embedding, skipping", chunk_id
                 )
 
         if not valid_metadata:
             self.index = None
-            print("Warning: No valid metadata with embeddings to rebuild index")
+            logger.warning("No valid metadata with embeddings to rebuild index")
             return
 
         # Get embedding dimension from first valid chunk
-        first_chunk = next(iter(valid_metadata.values()))
-        embedding_dim = len(first_chunk["embedding"])
+        _, first_embedding = next(iter(valid_metadata.values()))
+        embedding_dim = len(first_embedding)
 
         # Create new index
         try:
             import faiss
 
-            self.index = faiss.IndexFlatIP(embedding_dim)
-
             # Add all embeddings from valid metadata
             embeddings = []
-            for chunk_id, metadata in valid_metadata.items():
-                embedding = metadata["embedding"]
+            for metadata, embedding in valid_metadata.values():
                 embeddings.append(embedding)
 
                 # Update index position
                 metadata["index_position"] = len(embeddings) - 1
 
-            if embeddings:
-                embeddings_np = np.array(embeddings, dtype=np.float32)
-                self.index.add(embeddings_np)
-                print(f"Rebuilt index with {len(embeddings)} embeddings")
+            embeddings_np = np.array(embeddings, dtype=np.float32)
+            self._use_threads(self.ingest_threads)
+            self.index = self._new_index(faiss, embedding_dim, embeddings_np)
+            self._index_mapped = False
+            self.index.add(embeddings_np)
+            logger.debug("Rebuilt index with %d embeddings", len(embeddings))
 
         except ImportError as exc:
             raise RuntimeError(
                 "FAISS is required for semantic search. Install with: pip install faiss-cpu"
             ) from exc
 
-    def _save_index(self):
-        """Save the FAISS index to disk."""
-        if self.index is not None:
-            try:
-                import faiss
-            except ImportError as exc:
-                raise RuntimeError(
-                    "FAISS is required for semantic search. Install with: pip install faiss-cpu"
-                ) from exc
+    def _new_index(self, faiss, embedding_dim: int, sample: np.ndarray):
+        """Pick the index type for a rebuild over `sample`.
 
-            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-            faiss.write_index(self.index, self.index_path)
+        Large corpora use an 8-bit scalar quantizer (4x fewer bytes scanned per
+        query than float32); it is retrained on every rebuild so value ranges
+        track the current corpus. Very large corpora additionally go through
+        an HNSW graph. Small corpora stay on an exact flat index.
+        """
+        current = self._layout_of(self.index) if self.index is not None else None
+        layout = self._layout_for(sample.shape[0], current)
+        if layout == "flat":
+            return faiss.IndexFlatIP(embedding_dim)
+
+        if layout == "sq8":
+            index = faiss.IndexScalarQuantizer(
+                embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        elif self.quantize:
+            index = faiss.IndexHNSWSQ(
+                embedding_dim,
+                faiss.ScalarQuantizer.QT_8bit,
+                _HNSW_M,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        else:
+            index = faiss.IndexHNSWFlat(embedding_dim, _HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        if layout == "hnsw":
+            index.hnsw.efConstruction = _HNSW_EF_CONSTRUCTION
+
+        if not index.is_trained:
+            if sample.shape[0] > _SQ8_MAX_TRAIN_VECTORS:
+                rng = np.random.default_rng(0)
+                rows = rng.choice(sample.shape[0], _SQ8_MAX_TRAIN_VECTORS, replace=False)
+                sample = sample[np.sort(rows)]
+            index.train(sample)
+        return index
+
+    def _layout_for(self, count: int, current: Optional[str] = None) -> str:
+        layout = self._threshold_layout(count)
+        if current is not None and current != layout:
+            # Only keep `current` if it is the larger layout and the corpus is
+            # still within the downsize margin of its threshold.
+            if current == self._threshold_layout(int(count / _LAYOUT_DOWNSIZE_FRACTION)):
+                return current
+        return layout
+
+    def _threshold_layout(self, count: int) -> str:
+        if count >= _HNSW_MIN_VECTORS:
+            return "hnsw"
+        if self.quantize and count >= _SQ8_MIN_TRAIN_VECTORS:
+            return "sq8"
+        return "flat"
+
+    @staticmethod
+    def _layout_of(index) -> str:
+        import faiss
+
+        if isinstance(index, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(index, faiss.IndexScalarQuantizer):
+            return "sq8"
+        return "flat"
+
+    def _needs_rebuild(self) -> bool:
+        """Whether the index should be rebuilt from metadata.
+
+        True once dead rows pass `_DEAD_ROW_FRACTION` of the index, or when the
+        live corpus belongs in a different layout than the current index
+        (moving down only past `_LAYOUT_DOWNSIZE_FRACTION` of a threshold).
+        """
+        if self.index is None:
+            return False
+        total = self.index.ntotal
+        live = len(self.metadata)
+        if total - live > total * _DEAD_ROW_FRACTION:
             return True
+        current = self._layout_of(self.index)
+        return self._layout_for(live, current) != current
+
+    def _save_index(self):
+        """Schedule the FAISS index to be written to disk."""
+        if self.index is not None:
+            return self._mark_dirty("index")
         return True  # Return True if no index to save
 
+    def _write_index(self):
+        if self.index is None:
+            return
+        try:
+            import faiss
+        except ImportError as exc:
+            raise RuntimeError(
+                "FAISS is required for semantic search. Install with: pip install faiss-cpu"
+            ) from exc
+
+        replace_atomically(
+            self.index_path, lambda tmp_path: faiss.write_index(self.index, tmp_path)
+        )
+
+    def _mark_dirty(self, part: str) -> bool:
+        """Record that `part` changed and arrange for it to be persisted.
+
+        Autosave sends many small edits in a row; coalescing them means the full
+        index and metadata files are rewritten once per burst rather than once
+        per keystroke pause.
+        """
+        with self._lock:
+            self._dirty.add(part)
+            if self.flush_delay <= 0:
+                return self.flush()
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return True
+
+    @_synchronized
+    def flush(self) -> bool:
+        """Write any pending index, metadata, and note tree changes to disk."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        dirty, self._dirty = self._dirty, set()
+        try:
+            if "metadata" in dirty:
+                self._write_metadata()
+            if "index" in dirty:
+                self._write_index()
+            if "note_tree" in dirty:
+                self._write_note_tree()
+        except Exception as e:
+            self._dirty |= dirty
+            logger.error("Failed to persist search index: %s", e)
+            return False
+        return True
+
     def search(
-        self, query_embedding: List[float], exclude_note_id: str = None, top_k: int = 10
+        self,
+        query_embedding: List[float],
+        exclude_note_id: str = None,
+        top_k: int = 10,
+        ef_search: Optional[int] = None,
     ) -> List[Dict]:
         """
         Search for similar chunks.
@@ -269,70 +592,157 @@ class Indexer:
             query_embedding: Query embedding vector
             exclude_note_id: Optional note ID to exclude from results
             top_k: Number of results to return
+            ef_search: HNSW search breadth; ignored by other index types
 
         Returns:
             List of search results with note_id, chunk_id, excerpt, and score
         """
-        if self.index is None or self.index.ntotal == 0:
+        return self.search_batch([query_embedding], exclude_note_id, top_k, ef_search)[0]
+
+    @_synchronized
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        exclude_note_id: str = None,
+        top_k: int = 10,
+        ef_search: Optional[int] = None,
+    ) -> List[List[Dict]]:
+        """
+        Search for similar chunks for several queries in one FAISS call.
+
+        Args:
+            query_embeddings: Query embedding vectors
+            exclude_note_id: Optional note ID to exclude from results
+            top_k: Number of results to return per query
+            ef_search: HNSW search breadth (default 64); ignored by other
+                       index types
+
+        Returns:
+            One result list per query, each shaped like `search` results
+        """
+        if not len(query_embeddings):
             return []
+        if self.index is None or self.index.ntotal == 0:
+            return [[] for _ in query_embeddings]
 
-        # Convert query to numpy array
-        query_np = np.array([query_embedding], dtype=np.float32)
+        queries = np.array(query_embeddings, dtype=np.float32)
 
+        k = min(top_k * 2, self.index.ntotal)
         try:
-            # Search the index
-            distances, indices = self.index.search(
-                query_np, min(top_k * 2, self.index.ntotal)
-            )
+            self._use_threads(self.search_threads)
+            # Dead rows can outrank every live one (a note re-saved with small
+            # edits leaves near-identical copies), so FAISS skips them itself
+            # rather than returning them in place of live hits.
+            selector = self._live_row_selector()
+            params = None
+            if self._layout_of(self.index) == "hnsw":
+                import faiss
+
+                params = faiss.SearchParametersHNSW(
+                    efSearch=max(ef_search or _HNSW_EF_SEARCH, k)
+                )
+            elif selector is not None:
+                import faiss
+
+                params = faiss.SearchParameters()
+            if selector is not None:
+                params.sel = selector
+            if params is not None:
+                distances, indices = self.index.search(queries, k, params=params)
+            else:
+                distances, indices = self.index.search(queries, k)
+            return [
+                self._collect_hits(row_distances, row_indices, exclude_note_id, top_k)
+                for row_distances, row_indices in zip(distances, indices)
+            ]
+        except Exception as e:
+            logger.error("Search failed: %s", e)
+            return [[] for _ in query_embeddings]
 
-            results = []
-            seen_chunks = set()
+    def _collect_hits(
+        self, distances, indices, exclude_note_id: Optional[str], top_k: int
+    ) -> List[Dict]:
+        """Turn one row of FAISS output into result dicts, best score first."""
+        results = []
+        seen_chunks = set()
 
-            # Convert indices to chunk metadata
-            for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-                if idx == -1:  # No more results
-                    continue
+        for distance, idx in zip(distances, indices):
+            if idx == -1:  # No more results
+                continue
 
-                # Find chunk by index position
-                chunk_id = None
-                for cid, metadata in self.metadata.items():
-                    if metadata.get("index_position") == idx:
-                        chunk_id = cid
-                        break
+            chunk_id = self._chunk_id_at(int(idx))
 
-                if not chunk_id or chunk_id in seen_chunks:
-                    continue
+            if not chunk_id or chunk_id in seen_chunks:
+                continue
 
-                metadata = self.metadata[chunk_id]
+            metadata = self.metadata.get(chunk_id)
+            if metadata is None:
+                continue
 
-                # Skip if excluding this note
-                if exclude_note_id and metadata["note_id"] == exclude_note_id:
-                    continue
+            # Skip if excluding this note
+            if exclude_note_id and metadata["note_id"] == exclude_note_id:
+                continue
 
-                # Convert cosine similarity from FAISS (assuming normalized vectors)
-                score = float(distance)
+            # Convert cosine similarity from FAISS (assuming normalized vectors)
+            score = float(distance)
 
-                results.append(
-                    {
-                        "note_id": metadata["note_id"],
-                        "chunk_id": chunk_id,
-                        "excerpt": metadata["text"],
-                        "score": score,
-                    }
-                )
+            results.append(
+                {
+                    "note_id": metadata["note_id"],
+                    "chunk_id": chunk_id,
+                    "excerpt": metadata["text"],
+                    "score": score,
+                }
+            )
 
-                seen_chunks.add(chunk_id)
+            seen_chunks.add(chunk_id)
 
-                if len(results) >= top_k:
-                    break
+            if len(results) >= top_k:
+                break
 
-            # Sort by score (descending)
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results
+        # Sort by score (descending)
+        results.sort(key=lambda x: x["score"], reverse=True)
+        return results
 
-        except Exception as e:
-            print(f"Search failed: {e}")
-            return []
+    def _chunk_id_at(self, position: int) -> Optional[str]:
+        """Map a FAISS row back to its chunk id.
+
+        The lookup is built once per index layout (and dropped whenever rows are
+        added or reassigned) instead of scanning all metadata for every hit.
+        Callers hold the index lock, so rows and positions stay consistent.
+        """
+        return self._positions().get(position)
+
+    def _positions(self) -> Dict[int, str]:
+        if self._position_lookup is None:
+            self._position_lookup = {
+                metadata["index_position"]: chunk_id
+                for chunk_id, metadata in self.metadata.items()
+                if metadata.get("index_position") is not None
+            }
+        return self._position_lookup
+
+    def _live_row_selector(self):
+        """A FAISS selector admitting only rows that still map to a chunk.
+
+        None while the index has no dead rows. The bitmap is rebuilt only when
+        the position lookup or the row count changes.
+        """
+        total = self.index.ntotal
+        lookup = self._positions()
+        if len(lookup) >= total:
+            return None
+        cached = self._live_rows
+        if cached is None or cached[0] is not lookup or cached[1] != total:
+            import faiss
+
+            live = np.zeros(total, dtype=bool)
+            live[[position for position in lookup if position < total]] = True
+            # The selector only points at the bitmap; keep both alive together.
+            bitmap = np.packbits(live, bitorder="little")
+            selector = faiss.IDSelectorBitmap(total, faiss.swig_ptr(bitmap))
+            cached = self._live_rows = (lookup, total, bitmap, selector)
+        return cached[3]
 
     def _update_note_tree(self, note_id: str) -> bool:
         """Update the note tree structure.
@@ -363,10 +773,11 @@ class Indexer:
         # Save the updated tree
         save_result = self._save_note_tree()
         if not save_result:
-            print(f"Warning: Failed to save note tree after updating note: {note_id}")
+            logger.warning("Failed to save note tree after updating note: %s", note_id)
             return False
         return True
 
+    @_synchronized
     def create_folder(self, folder_path: str):
         """Create a folder in the note tree."""
         try:
@@ -395,20 +806,19 @@ class Indexer:
             # Folders are represented as dicts with type: "folder"
             success = self._save_note_tree()
             if success:
-                print(f"Created folder: {folder_path}")
+                logger.debug("Created folder: %s", folder_path)
                 return True
             else:
-                print(
-                    f"Warning: Failed to save note tree for folder: {folder_path}, but folder was created in memory"
+                logger.warning(
+                    "Failed to save note tree for folder: %s, but folder was created in memory",
+                    folder_path,
                 )
                 return False  # Return False when save fails
         except Exception as e:
-            print(f"Error in create_folder: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error in create_folder: %s", e)
             return False  # Return False on exception
 
+    @_synchronized
     def rename_note(self, old_note_id: str, new_note_id: str):
         """Rename a note or folder in the index."""
         # Check if it's a note with metadata or a folder in the note tree
@@ -416,7 +826,7 @@ class Indexer:
         is_folder = self._note_exists_in_tree(old_note_id)
 
         if not (is_note or is_folder):
-            print(f"Note/folder {old_note_id} not found")
+            logger.warning("Note/folder %s not found", old_note_id)
             return False
 
         # Update metadata if it's a note
@@ -438,13 +848,19 @@ class Indexer:
         metadata_saved = self._save_metadata()
 
         if metadata_saved and note_tree_saved:
-            print(
-                f"Renamed {'folder' if is_folder else 'note'} from {old_note_id} to {new_note_id}"
+            logger.debug(
+                "Renamed %s from %s to %s",
+                "folder" if is_folder else "note",
+                old_note_id,
+                new_note_id,
             )
             return True
         else:
-            print(
-                f"Warning: Failed to save metadata or note tree when renaming {old_note_id} to {new_note_id}, but rename was performed in memory"
+            logger.warning(
+                "Failed to save metadata or note tree when renaming %s to %s, "
+                "but rename was performed in memory",
+                old_note_id,
+                new_note_id,
             )
             return False  # Return False when save fails
 
@@ -482,7 +898,7 @@ class Indexer:
         old_folder_contents = None
         for i, part in enumerate(old_parts):
             if part not in old_parent:
-                print(f"Folder not found: {old_folder_id}")
+                logger.warning("Folder not found: %s", old_folder_id)
                 return False
             if i == len(old_parts) - 1:
                 # This is the folder itself - make a deep copy before removal
@@ -495,8 +911,8 @@ class Indexer:
 
         # old_folder_contents should always be set at this point if we didn't return False
         if old_folder_contents is None:
-            print(
-                f"Unexpected error: Failed to get folder contents for {old_folder_id}"
+            logger.error(
+                "Unexpected error: Failed to get folder contents for %s", old_folder_id
             )
             return False
 
@@ -504,8 +920,8 @@ class Indexer:
 
         removed = self._remove_from_note_tree(old_folder_id)
         if not removed:
-            print(
-                f"Warning: Failed to remove folder from old location: {old_folder_id}"
+            logger.warning(
+                "Failed to remove folder from old location: %s", old_folder_id
             )
 
         # Add to new location with folder type
@@ -576,12 +992,14 @@ class Indexer:
         # Save the updated tree
         save_result = self._save_note_tree()
         if not save_result:
-            print(
-                f"Warning: Failed to save note tree after updating folder: {old_folder_id} -> {new_folder_id}"
+            logger.warning(
+                "Failed to save note tree after updating folder: %s -> %s",
+                old_folder_id,
+                new_folder_id,
             )
             return False
 
-        print(f"Updated folder from {old_folder_id} to {new_folder_id}")
+        logger.debug("Updated folder from %s to %s", old_folder_id, new_folder_id)
         return True
 
     def _remove_from_note_tree(self, note_id: str) -> bool:
@@ -616,9 +1034,10 @@ class Indexer:
 
         success = remove_recursive(self.note_tree, parts)
         if not success:
-            print(f"Warning: Failed to remove note/folder from tree: {note_id}")
+            logger.warning("Failed to remove note/folder from tree: %s", note_id)
         return success
 
+    @_synchronized
     def delete_note(self, note_id: str):
         """Delete a note or folder from the index.
 
@@ -634,7 +1053,7 @@ class Indexer:
                 metadata["note_id"] == note_id for metadata in self.metadata.values()
             )
             if not has_metadata:
-                print(f"Note/folder not found: {note_id}")
+                logger.warning("Note/folder not found: %s", note_id)
                 return False, []
 
         # Check if this is a folder by looking at the note tree structure
@@ -693,14 +1112,14 @@ class Indexer:
                     node = node[part]
                 else:
                     # Folder not found
-                    print(f"Folder not found: {note_id}")
+                    logger.warning("Folder not found: %s", note_id)
                     return False, []
 
             # Double-check this is actually a folder
             if not is_folder:
                 # This shouldn't happen if is_item_folder returned True, but just in case
-                print(
-                    f"Warning: Item {note_id} was identified as folder but doesn't appear to be one"
+                logger.warning(
+                    "Item %s was identified as folder but doesn't appear to be one", note_id
                 )
                 # Treat it as a regular note
                 notes_to_delete = [note_id]
@@ -726,25 +1145,30 @@ class Indexer:
 
         for chunk_id in chunks_to_remove:
             del self.metadata[chunk_id]
+        if chunks_to_remove:
+            self._position_lookup = None
 
         # Remove from note tree
         self._remove_from_note_tree(note_id)
 
-        # Rebuild index
-        self._rebuild_index()
+        # Compact the index only once enough rows are dead
+        if self._needs_rebuild():
+            self._rebuild_index()
 
         metadata_saved = self._save_metadata()
         index_saved = self._save_index()
         note_tree_saved = self._save_note_tree()
 
         if metadata_saved and index_saved and note_tree_saved:
-            print(f"Deleted {'folder' if is_folder else 'note'}: {note_id}")
+            logger.debug("Deleted %s: %s", "folder" if is_folder else "note", note_id)
             if is_folder and notes_to_delete:
-                print(f"  Also deleted {len(notes_to_delete)} notes inside the folder")
+                logger.debug("  Also deleted %d notes inside the folder", len(notes_to_delete))
             return True, notes_to_delete
         else:
-            print(
-                f"Warning: Failed to save when deleting {'folder' if is_folder else 'note'}: {note_id}, but deletion was performed in memory"
+            logger.warning(
+                "Failed to save when deleting %s: %s, but deletion was performed in memory",
+                "folder" if is_folder else "note",
+                note_id,
             )
             return (
                 False,
@@ -797,6 +1221,7 @@ class Indexer:
         """Get metadata for a specific chunk."""
         return self.metadata.get(chunk_id)
 
+    @_synchronized
     def get_note_chunks(self, note_id: str) -> List[Dict]:
         """Get all chunks for a specific note."""
         return [
@@ -805,35 +1230,61 @@ class Indexer:
             if metadata["note_id"] == note_id
         ]
 
+    def get_note_embeddings(
+        self, note_id: str, model: Optional[str] = None
+    ) -> Dict[str, List[float]]:
+        """Map each stored chunk text of a note to its embedding.
+
+        With `model`, only chunks embedded by that model are returned.
+        """
+        return self._embeddings_by_text(self.get_note_chunks(note_id), model)
+
+    @_synchronized
+    def get_all_embeddings(self, model: Optional[str] = None) -> Dict[str, List[float]]:
+        """Like `get_note_embeddings`, across every indexed chunk."""
+        return self._embeddings_by_text(list(self.metadata.values()), model)
+
+    @staticmethod
+    def _embeddings_by_text(chunks, model: Optional[str]) -> Dict[str, List[float]]:
+        embeddings = {}
+        for metadata in chunks:
+            if model is not None and metadata.get("model") != model:
+                continue
+            embedding = _unpack_embedding(metadata)
+            if embedding is not None:
+                embeddings[metadata["text"]] = embedding.tolist()
+        return embeddings
+
+    @_synchronized
     def get_stats(self) -> Dict:
         """Get statistics about the index."""
+        chunks_per_note = Counter(m["note_id"] for m in self.metadata.values())
         stats = {
             "total_chunks": len(self.metadata),
-            "total_notes": len(set(m["note_id"] for m in self.metadata.values())),
+            "total_notes": len(chunks_per_note),
             "faiss_index_size": self.index.ntotal if self.index else 0,
             "metadata_file": self.metadata_path,
             "index_file": self.index_path,
+            "chunks_per_note": dict(chunks_per_note),
         }
 
-        # Count chunks per note
-        chunks_per_note = {}
-        for metadata in self.metadata.values():
-            note_id = metadata["note_id"]
-            chunks_per_note[note_id] = chunks_per_note.get(note_id, 0) + 1
-
-        stats["chunks_per_note"] = chunks_per_note
-
         return stats
 
+    @_synchronized
     def clear(self):
         """Clear the entire index."""
         self.metadata = {}
         self.note_tree = {}
         self.index = None
+        self._position_lookup = None
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        self._dirty.clear()
 
         # Remove files
         for path in [self.index_path, self.metadata_path]:
             if os.path.exists(path):
                 os.remove(path)
 
-        print("Index cleared")
+        logger.info("Index cleared")
@@ -0,0 +1,66 @@
+"""JSON file helpers backed by orjson."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any
+
+import orjson
+
+# Larger than the 8KB default so big note/index files and the line-by-line
+# snapshot writes need far fewer read/write syscalls.
+BUFFER_SIZE = 64 * 1024
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data)
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload)
+
+
+def dumps_line(payload: Any) -> bytes:
+    """Serialize `payload` as one compact NDJSON line."""
+    return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def read_json(path: str | os.PathLike[str]) -> Any:
+    with open(path, "rb", buffering=BUFFER_SIZE) as handle:
+        return orjson.loads(handle.read())
+
+
+# Match the stdlib json leniency callers relied on: non-str dict keys are
+# stringified and numpy scalars/arrays serialize as plain numbers.
+_WRITE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def replace_atomically(path: str | os.PathLike[str], write) -> None:
+    """Write via `write(tmp_path)` and swap the result into place.
+
+    Readers and crashes see either the old file or the complete new one. Each
+    call writes its own temp file, so concurrent writers never share one.
+    """
+    path = os.fspath(path)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path: str | os.PathLike[str], payload: Any, *, indent: bool = True) -> None:
+    option = _WRITE_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+    with open(path, "wb", buffering=BUFFER_SIZE) as handle:
+        handle.write(orjson.dumps(payload, option=option))
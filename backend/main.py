@@ -3,13 +3,19 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import stat
+from email.utils import parsedate
+from os import environ
+from os.path import splitext
 from pathlib import Path
-from uuid import uuid4
+from secrets import token_hex
 import uvicorn
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import BackgroundTasks, FastAPI, File, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import traceback
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response
+from pydantic import TypeAdapter
 
 from models import (
     CreateFolderRequest,
@@ -32,9 +38,40 @@ from models import (
 )
 from context_models import ContextRequest, ContextResponsePayload, WarmupRequest, WarmupResponsePayload
 from app_state import GrimoireAppState
+from executors import run_in_embed_pool, run_in_io_pool, shutdown_executors
+from hashing import content_key
+from jsonio import dumps
+from query_batcher import QueryBatcher
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Grimoire Backend", description="Semantic notes backend API")
 
+
+class _AttachmentSizeLimit:
+    """Reject uploads whose Content-Length is over the limit before reading them.
+
+    FastAPI parses the multipart body before the route runs, so the check has
+    to happen here. Uploads without a length still hit the streaming check.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/attachments":
+            for name, value in scope["headers"]:
+                if name == b"content-length" and value.isdigit():
+                    if int(value) > _MAX_ATTACHMENT_BYTES + _MULTIPART_OVERHEAD_BYTES:
+                        response = JSONResponse({"detail": "Attachment too large"}, status_code=413)
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+# Added before CORS so its 413s still carry the CORS headers.
+app.add_middleware(_AttachmentSizeLimit)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -43,28 +80,151 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _env_flag(name: str, default: str) -> bool:
+    return environ.get(name, default).strip().lower() not in ("0", "false", "no", "off")
+
+
+# Compress large JSON/markdown responses for clients on another machine. The
+# app talks to the backend over loopback, where compression only costs CPU,
+# so this stays off unless a minimum size is configured.
+_GZIP_MIN_SIZE = int(environ.get("GRIMOIRE_GZIP_MIN_SIZE", "0"))
+if _GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=_GZIP_MIN_SIZE, compresslevel=5)
+
 state = GrimoireAppState()
 
-_ALLOWED_IMAGE_EXTENSIONS: set[str] = {
-    ".png",
-    ".jpg",
-    ".jpeg",
-    ".gif",
-    ".webp",
-    ".heic",
-    ".heif",
-}
+_ALLOWED_IMAGE_EXTENSIONS: frozenset[str] = frozenset(
+    {
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".webp",
+        ".heic",
+        ".heif",
+    }
+)
 _MAX_ATTACHMENT_BYTES = 25 * 1024 * 1024
+_ATTACHMENT_CHUNK_BYTES = 1024 * 1024
+# Multipart boundaries and part headers around the file; generous on purpose.
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+_ATTACHMENT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Note reads may be cached but must be revalidated against the tree ETag.
+_NOTES_CACHE_CONTROL = "private, must-revalidate"
+
+# In-flight /search work by (search service, note, query text). Typing fires
+# the same query repeatedly; concurrent duplicates await one shared result.
+_pending_searches: dict[tuple, asyncio.Future] = {}
+# Distinct concurrent queries are embedded and searched together.
+_search_batcher = QueryBatcher()
+# Deferred reindexes queued but not yet started, by (note service, note id).
+_pending_reindex: set[tuple] = set()
+# Opt-in: load models and indexes for the open project as soon as the server
+# starts, instead of on the first /search, /context or /glossary.
+_WARMUP_ON_STARTUP = _env_flag("GRIMOIRE_WARMUP_ON_STARTUP", "0")
+_startup_tasks: set[asyncio.Task] = set()
+
+
+async def _warm_up_services() -> None:
+    try:
+        services = state.current()
+        records = await asyncio.to_thread(services.storage.list_records)
+        await run_in_embed_pool(services.context.warmup, records.values(), False)
+        await run_in_embed_pool(services.glossary.ensure_built)
+    except Exception:
+        logger.exception("Startup warmup failed")
+
+
+@app.on_event("startup")
+async def _on_startup():
+    if _WARMUP_ON_STARTUP:
+        # Run in the background so /health answers (and the app's boot overlay
+        # clears) while models load; early requests just wait on the pool.
+        task = asyncio.create_task(_warm_up_services())
+        _startup_tasks.add(task)
+        task.add_done_callback(_startup_tasks.discard)
+
+
+@app.on_event("shutdown")
+async def _on_shutdown():
+    await _search_batcher.stop()
+    shutdown_executors()
+    state.flush()
+
+
+# Encoded once. Each probe still gets its own Response: middleware such as
+# CORS edits the header list in place, so a shared instance would accumulate.
+_HEALTH_BODY = dumps({"status": "ok", "message": "Grimoire backend is running"})
 
 
 @app.get("/", tags=["health"])
 async def root():
-    return {"status": "ok", "message": "Grimoire backend is running"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.get("/health", tags=["health"])
 async def health():
-    return {"status": "ok", "message": "Grimoire backend is running"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+async def _reindex_note(notes, note_id: str, key: tuple) -> None:
+    # Clear the key before running so a write that lands mid-reindex queues
+    # another pass instead of being lost.
+    _pending_reindex.discard(key)
+    await run_in_embed_pool(notes.reindex_note, note_id)
+
+
+def _json_response(model_cls, payload) -> Response:
+    """Serialize `payload` as `model_cls` in one pydantic-core pass.
+
+    Returning a Response skips FastAPI's second validation of the return value
+    against `response_model`, which for large trees cost as much as building
+    them. The route's `response_model` still documents the schema.
+    """
+    return Response(content=_json_body(model_cls, payload), media_type="application/json")
+
+
+# One adapter per response model, built on first use. `dump_json` returns
+# bytes directly instead of a str that then has to be re-encoded.
+_ADAPTERS: dict = {}
+
+
+def _json_body(model_cls, payload) -> bytes:
+    adapter = _ADAPTERS.get(model_cls)
+    if adapter is None:
+        adapter = _ADAPTERS[model_cls] = TypeAdapter(model_cls)
+    if not isinstance(payload, model_cls):
+        payload = adapter.validate_python(payload)
+    return adapter.dump_json(payload)
+
+
+def _is_attachment_name(filename: str) -> bool:
+    # A single, non-relative path component cannot leave attachments_dir, so
+    # there is no need to resolve (and stat every parent of) the joined path.
+    return filename not in ("", ".", "..") and Path(filename).name == filename
+
+
+def _open_attachment(attachments_dir: Path, filename: str):
+    dest = attachments_dir / filename
+    try:
+        handle = open(dest, "xb")
+    except FileNotFoundError:
+        # Opening a project creates attachments_dir; only recreate it if removed.
+        attachments_dir.mkdir(parents=True, exist_ok=True)
+        handle = open(dest, "xb")
+    return dest, handle
+
+
+def _stat_attachment(attachments_dir: Path, filename: str):
+    path = attachments_dir / filename
+    # One stat, reused by FileResponse instead of it stat-ing the file again.
+    try:
+        stat_result = path.stat()
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    return path, stat_result
 
 
 @app.post("/attachments", tags=["attachments"])
@@ -72,85 +232,113 @@ async def upload_attachment(file: UploadFile = File(...)):
     try:
         if not file.filename:
             raise HTTPException(status_code=400, detail="Missing filename")
-        ext = Path(file.filename).suffix.lower()
+        ext = splitext(file.filename)[1].lower()
         if ext not in _ALLOWED_IMAGE_EXTENSIONS:
             raise HTTPException(status_code=400, detail=f"Unsupported image type: {ext or '(none)'}")
         if file.content_type and not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail=f"Unsupported content type: {file.content_type}")
 
-        data = await file.read()
-        if not data:
-            raise HTTPException(status_code=400, detail="Empty upload")
-        if len(data) > _MAX_ATTACHMENT_BYTES:
-            raise HTTPException(status_code=413, detail="Attachment too large")
-
         services = state.current()
-        attachments_dir = services.project.attachments_dir
-        attachments_dir.mkdir(parents=True, exist_ok=True)
-
-        filename = f"{uuid4().hex}{ext}"
-        dest = (attachments_dir / filename).resolve()
-        root = attachments_dir.resolve()
-        if root not in dest.parents:
-            raise HTTPException(status_code=400, detail="Invalid attachment path")
-
-        await asyncio.to_thread(dest.write_bytes, data)
+        filename = f"{token_hex(16)}{ext}"
+        dest, handle = await run_in_io_pool(
+            _open_attachment, services.project.attachments_dir, filename
+        )
+        # Copy in bounded chunks so an upload never sits in memory whole.
+        total = 0
+        try:
+            with handle:
+                while chunk := await file.read(_ATTACHMENT_CHUNK_BYTES):
+                    total += len(chunk)
+                    if total > _MAX_ATTACHMENT_BYTES:
+                        raise HTTPException(status_code=413, detail="Attachment too large")
+                    await run_in_io_pool(handle.write, chunk)
+            if not total:
+                raise HTTPException(status_code=400, detail="Empty upload")
+        except BaseException:
+            await run_in_io_pool(dest.unlink, missing_ok=True)
+            raise
         return {"url": f"/attachments/{filename}", "filename": filename}
     except HTTPException:
         raise
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Attachment upload failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
-@app.get("/attachments/{filename}", tags=["attachments"])
-async def get_attachment(filename: str):
+def _attachment_not_modified(request: Request, response: FileResponse) -> bool:
+    # Same rules as StaticFiles: any matching ETag, else an unchanged mtime.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = response.headers.get("etag")
+        return etag in [tag.strip(" W/") for tag in if_none_match.split(",")]
+    if_modified_since = parsedate(request.headers.get("if-modified-since") or "")
+    last_modified = parsedate(response.headers.get("last-modified") or "")
+    return (
+        if_modified_since is not None
+        and last_modified is not None
+        and if_modified_since >= last_modified
+    )
+
+
+@app.api_route("/attachments/{filename}", methods=["GET", "HEAD"], tags=["attachments"])
+async def get_attachment(filename: str, request: Request):
     try:
         if not filename:
             raise HTTPException(status_code=400, detail="Missing attachment name")
-        if Path(filename).name != filename:
+        if not _is_attachment_name(filename):
             raise HTTPException(status_code=400, detail="Invalid attachment path")
 
         services = state.current()
-        root = services.project.attachments_dir.resolve()
-        path = (root / filename).resolve()
-        if root not in path.parents:
-            raise HTTPException(status_code=400, detail="Invalid attachment path")
-        if not path.exists() or not path.is_file():
-            raise HTTPException(status_code=404, detail="Attachment not found")
-
-        return FileResponse(path=str(path))
+        path, stat_result = await run_in_io_pool(
+            _stat_attachment, services.project.attachments_dir, filename
+        )
+        # Attachment names are random and never rewritten, so clients may cache forever.
+        response = FileResponse(
+            path=str(path),
+            stat_result=stat_result,
+            headers={"Cache-Control": _ATTACHMENT_CACHE_CONTROL},
+        )
+        if _attachment_not_modified(request, response):
+            # Revalidating clients get the validators back without the body.
+            headers = {
+                key: response.headers[key]
+                for key in ("cache-control", "etag", "last-modified")
+            }
+            return Response(status_code=304, headers=headers)
+        return response
     except HTTPException:
         raise
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Attachment read failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
+
+def _project_info(project, is_active: bool) -> ProjectInfoPayload:
+    # Built from trusted ProjectInfo values; model_construct skips validation.
+    return ProjectInfoPayload.model_construct(
+        name=project.name, path=str(project.root), is_active=is_active
+    )
+
+
+def _project_response(project) -> Response:
+    payload = ProjectResponsePayload.model_construct(project=_project_info(project, True))
+    return _json_response(ProjectResponsePayload, payload)
+
+
 @app.get("/projects", response_model=ProjectsResponsePayload, tags=["projects"])
 async def list_projects():
     try:
-        current_root = state.current().project.root
-        projects = []
-        for project in state.project_manager.list_projects():
-            projects.append(
-                ProjectInfoPayload(
-                    name=project.name,
-                    path=str(project.root),
-                    is_active=project.root.resolve() == current_root.resolve(),
-                )
-            )
+        active = state.current().project
+        current_root = active.root.resolve()
+        known = await asyncio.to_thread(state.project_manager.list_projects)
+        projects = [
+            _project_info(project, project.root.resolve() == current_root) for project in known
+        ]
         # If the active project is external (opened by path), include it too.
         if not any(p.is_active for p in projects):
-            active = state.current().project
-            projects.insert(
-                0,
-                ProjectInfoPayload(
-                    name=active.name,
-                    path=str(active.root),
-                    is_active=True,
-                ),
-            )
-        return ProjectsResponsePayload(projects=projects)
+            projects.insert(0, _project_info(active, True))
+        payload = ProjectsResponsePayload.model_construct(projects=projects)
+        return _json_response(ProjectsResponsePayload, payload)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -158,10 +346,7 @@ async def list_projects():
 @app.get("/projects/current", response_model=ProjectResponsePayload, tags=["projects"])
 async def current_project():
     try:
-        project = state.current().project
-        return ProjectResponsePayload(
-            project=ProjectInfoPayload(name=project.name, path=str(project.root), is_active=True)
-        )
+        return _project_response(state.current().project)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -169,11 +354,8 @@ async def current_project():
 @app.post("/projects/create", response_model=ProjectResponsePayload, tags=["projects"])
 async def create_project(request: CreateProjectRequest):
     try:
-        services = state.create_project(request.name)
-        project = services.project
-        return ProjectResponsePayload(
-            project=ProjectInfoPayload(name=project.name, path=str(project.root), is_active=True)
-        )
+        services = await asyncio.to_thread(state.create_project, request.name)
+        return _project_response(services.project)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -181,62 +363,116 @@ async def create_project(request: CreateProjectRequest):
 @app.post("/projects/open", response_model=ProjectResponsePayload, tags=["projects"])
 async def open_project(request: OpenProjectRequest):
     try:
-        services = state.open_project(name=request.name, path=request.path)
-        project = services.project
-        return ProjectResponsePayload(
-            project=ProjectInfoPayload(name=project.name, path=str(project.root), is_active=True)
+        services = await asyncio.to_thread(
+            state.open_project, name=request.name, path=request.path
         )
+        return _project_response(services.project)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Project not found")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+def _notes_etag(services) -> str:
+    """Weak validator for note reads: the project plus the storage revision.
+
+    The storage instance id keeps a validator from an earlier process or an
+    earlier open of the project from matching once the counter restarts.
+    """
+    storage = services.storage
+    root = content_key(str(services.project.root))[:12]
+    return f'W/"{root}-{storage.instance_id}-{storage.revision}"'
+
+
+def _not_modified(request: Request, etag: str) -> Response | None:
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=_revalidate_headers(etag))
+    return None
+
+
+def _revalidate_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": _NOTES_CACHE_CONTROL}
+
+
 @app.get("/notes", response_model=NotesResponsePayload, tags=["notes"])
-async def notes():
+async def notes(request: Request):
     try:
-        return state.current().notes.tree()
+        services = state.current()
+        etag = _notes_etag(services)
+        cached = _not_modified(request, etag)
+        if cached is not None:
+            return cached
+        # The ETag names the project and revision, so it doubles as the key
+        # for the serialized tree: refreshes skip the walk and serialization.
+        body = await asyncio.to_thread(
+            state.cached_response,
+            ("notes", etag),
+            lambda: _json_body(NotesResponsePayload, services.notes.tree()),
+        )
+        return Response(
+            content=body, media_type="application/json", headers=_revalidate_headers(etag)
+        )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+def _glossary_terms(glossary_service) -> list:
+    # Building and sorting the term list is CPU work; callers run it in the
+    # embed pool right after `ensure_built`.
+    return [
+        {
+            "concept_id": entry.concept_id,
+            "display_name": entry.display_name,
+            "kind": entry.kind,
+            "chunk_count": int(len(entry.chunk_ids)),
+            "definition_excerpt": entry.definition_excerpt,
+            "source_note_id": entry.source_note_id,
+            "last_updated": float(entry.last_updated),
+        }
+        for entry in glossary_service.list_entries()
+    ]
+
+
+def _glossary_body(services) -> bytes:
+    glossary_service = services.glossary
+    glossary_service.ensure_built()
+    # Read the revision before listing so a concurrent update can only make
+    # the cached body newer than its key, never older.
+    key = ("glossary", str(services.project.root), glossary_service.revision)
+    # The term dicts are built with plain str/int/float values already, so
+    # they go straight to orjson without a GlossaryResponsePayload round-trip.
+    return state.cached_response(
+        key, lambda: dumps({"terms": _glossary_terms(glossary_service)})
+    )
+
+
+def _glossary_entry(glossary_service, concept_id: str):
+    glossary_service.ensure_built()
+    return glossary_service.entry(concept_id)
+
+
 @app.get("/glossary", response_model=GlossaryResponsePayload, tags=["glossary"])
 async def glossary():
     try:
-        services = state.current()
-        services.glossary.ensure_built()
-        terms = []
-        for entry in services.glossary.list_entries():
-            terms.append(
-                {
-                    "concept_id": entry.concept_id,
-                    "display_name": entry.display_name,
-                    "kind": entry.kind,
-                    "chunk_count": int(len(entry.chunk_ids)),
-                    "definition_excerpt": entry.definition_excerpt,
-                    "source_note_id": entry.source_note_id,
-                    "last_updated": float(entry.last_updated),
-                }
-            )
-        return GlossaryResponsePayload(terms=terms)
+        body = await run_in_embed_pool(_glossary_body, state.current())
+        return Response(content=body, media_type="application/json")
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Glossary listing failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
 @app.get("/glossary/{concept_id}", response_model=GlossaryTermDetailPayload, tags=["glossary"])
 async def glossary_term(concept_id: str):
     try:
-        services = state.current()
-        services.glossary.ensure_built()
-        entry = services.glossary.entry(concept_id)
+        glossary_service = state.current().glossary
+        entry = await run_in_embed_pool(_glossary_entry, glossary_service, concept_id)
         if entry is None:
             raise HTTPException(status_code=404, detail="Term not found")
         supporting = [
             {"chunk_id": cid, "note_id": nid, "excerpt": ex}
             for (cid, nid, ex) in (entry.supporting or [])
         ]
-        return GlossaryTermDetailPayload(
+        payload = GlossaryTermDetailPayload.model_construct(
             concept_id=entry.concept_id,
             display_name=entry.display_name,
             kind=entry.kind,
@@ -247,22 +483,31 @@ async def glossary_term(concept_id: str):
             source_note_id=entry.source_note_id,
             supporting=supporting,
         )
+        return _json_response(GlossaryTermDetailPayload, payload)
     except HTTPException:
         raise
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Glossary term lookup failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
 @app.get("/all-notes", response_model=NotesResponsePayload, tags=["notes"])
-async def all_notes():
-    return await notes()
+async def all_notes(request: Request):
+    return await notes(request)
 
 
 @app.get("/note/{note_id:path}", response_model=NoteContentPayload, tags=["notes"])
-async def get_note(note_id: str):
+async def get_note(note_id: str, request: Request):
     try:
-        return state.current().notes.get_note(note_id)
+        services = state.current()
+        etag = _notes_etag(services)
+        cached = _not_modified(request, etag)
+        if cached is not None:
+            return cached
+        note = await asyncio.to_thread(services.notes.get_note, note_id)
+        response = _json_response(NoteContentPayload, note)
+        response.headers.update(_revalidate_headers(etag))
+        return response
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Note not found")
     except Exception as exc:
@@ -272,8 +517,43 @@ async def get_note(note_id: str):
 @app.post("/update-note", tags=["notes"])
 async def update_note(request: UpdateNoteRequest):
     try:
-        record = state.current().notes.save_note(request)
+        record = await run_in_embed_pool(state.current().notes.save_note, request)
+        return {"success": True, "note_id": record.id}
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.post("/update-note-raw", tags=["notes"])
+async def update_note_raw(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    note_id: str,
+    parent_id: str | None = None,
+):
+    try:
+        # Read the plain-text body directly; large notes skip JSON decoding, and
+        # indexing runs after the response instead of blocking it.
+        body = bytearray()
+        async for chunk in request.stream():
+            body.extend(chunk)
+        content = body.decode("utf-8")
+        del body
+
+        notes = state.current().notes
+        record, changed = await asyncio.to_thread(
+            notes.write_note,
+            UpdateNoteRequest(note_id=note_id, content=content, parent_id=parent_id),
+        )
+        if changed:
+            key = (id(notes), record.id)
+            # Autosave can land several writes before the first reindex starts;
+            # one pending reindex per note picks up the latest stored content.
+            if key not in _pending_reindex:
+                _pending_reindex.add(key)
+                background_tasks.add_task(_reindex_note, notes, record.id, key)
         return {"success": True, "note_id": record.id}
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Note content must be UTF-8")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -281,7 +561,7 @@ async def update_note(request: UpdateNoteRequest):
 @app.post("/create-note", tags=["notes"])
 async def create_note(request: CreateNoteRequest):
     try:
-        record = state.current().notes.create_note(request)
+        record = await run_in_embed_pool(state.current().notes.create_note, request)
         return {
             "success": True,
             "note_id": record.id,
@@ -299,7 +579,7 @@ async def create_note(request: CreateNoteRequest):
 @app.post("/create-folder", tags=["notes"])
 async def create_folder(request: CreateFolderRequest):
     try:
-        folder = state.current().notes.create_folder(request)
+        folder = await asyncio.to_thread(state.current().notes.create_folder, request)
         return {
             "success": True,
             "folder_id": folder.id,
@@ -317,7 +597,9 @@ async def create_folder(request: CreateFolderRequest):
 @app.post("/rename-note", tags=["notes"])
 async def rename(request: RenameNoteRequest):
     try:
-        new_id = state.current().notes.rename_item(request.old_note_id, request.new_note_id)
+        new_id = await run_in_embed_pool(
+            state.current().notes.rename_item, request.old_note_id, request.new_note_id
+        )
         return {"success": True, "note_id": new_id}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -328,7 +610,9 @@ async def rename(request: RenameNoteRequest):
 @app.post("/move-item", tags=["notes"])
 async def move_item(request: MoveItemRequest):
     try:
-        record = state.current().notes.move_item(request.note_id, request.parent_id)
+        record = await asyncio.to_thread(
+            state.current().notes.move_item, request.note_id, request.parent_id
+        )
         return {"success": True, "note_id": record.id, "parent_id": record.parent_id}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -339,7 +623,7 @@ async def move_item(request: MoveItemRequest):
 @app.post("/delete-note", tags=["notes"])
 async def delete(request: DeleteNoteRequest):
     try:
-        deleted = state.current().notes.delete_item(request.note_id)
+        deleted = await asyncio.to_thread(state.current().notes.delete_item, request.note_id)
         return {"success": True, "deleted": deleted}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -348,29 +632,43 @@ async def delete(request: DeleteNoteRequest):
 
 
 @app.post("/search", response_model=SearchResponsePayload, tags=["search"])
-async def search(request: SearchRequest):
+async def search(request: SearchRequest, http_request: Request):
     try:
-        hits = await asyncio.to_thread(state.current().search.search, request)
-        return SearchResponsePayload(results=hits)
+        # Skip queries the client has already abandoned (superseded keystrokes).
+        if await http_request.is_disconnected():
+            raise HTTPException(status_code=499, detail="Client closed request")
+        service = state.current().search
+        key = (id(service), request.note_id, content_key(request.text))
+        pending = _pending_searches.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(_search_batcher.submit(service, request))
+            _pending_searches[key] = pending
+            pending.add_done_callback(lambda _: _pending_searches.pop(key, None))
+        # Shield so one caller going away does not cancel the shared search.
+        hits = await asyncio.shield(pending)
+        payload = SearchResponsePayload.model_construct(results=hits)
+        return _json_response(SearchResponsePayload, payload)
+    except HTTPException:
+        raise
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Search failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
 @app.post("/context", response_model=ContextResponsePayload, tags=["search"])
 async def context(request: ContextRequest):
     try:
-        hits = await asyncio.to_thread(state.current().notes.semantic_context, request)
+        hits = await run_in_embed_pool(state.current().notes.semantic_context, request)
         return ContextResponsePayload(results=hits)
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Context lookup failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
 @app.post("/admin/rebuild-index", tags=["admin"])
 async def rebuild_index():
     try:
-        processed = await asyncio.to_thread(state.current().notes.rebuild_index)
+        processed = await run_in_embed_pool(state.current().notes.rebuild_index)
         return {"success": True, "notes_indexed": processed}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
@@ -380,7 +678,7 @@ async def rebuild_index():
 async def rebuild_glossary():
     try:
         services = state.current()
-        count = await asyncio.to_thread(services.glossary.rebuild)
+        count = await run_in_embed_pool(services.glossary.rebuild)
         return {
             "success": True,
             "terms": int(count),
@@ -388,7 +686,7 @@ async def rebuild_glossary():
             "fallback_notes": int(getattr(services.glossary, "last_build_fallback_notes", 0)),
         }
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Glossary rebuild failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
@@ -396,20 +694,38 @@ async def rebuild_glossary():
 async def warmup(request: WarmupRequest = WarmupRequest()):
     try:
         services = state.current()
-        records = services.storage.list_records()
+        records = await asyncio.to_thread(services.storage.list_records)
         # When force_rebuild is requested, rebuild both the semantic-context index
         # and the classic search index to keep the app consistent after upgrades.
         if request.force_rebuild:
-            await asyncio.to_thread(services.notes.rebuild_index)
-        return await asyncio.to_thread(
+            await run_in_embed_pool(services.notes.rebuild_index)
+        return await run_in_embed_pool(
             services.context.warmup,
             records.values(),
             bool(request.force_rebuild),
         )
     except Exception as exc:
-        traceback.print_exc()
+        logger.exception("Warmup failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    # Handlers log from the event loop; formatting records (tracebacks
+    # included) and writing them to stderr happens on the listener's thread.
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(levelname)s:%(name)s: %(message)s"))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream)
+    # Debug/info output is opt-in so hot paths skip formatting entirely.
+    log_level = environ.get("GRIMOIRE_LOG_LEVEL", "WARNING")
+    logging.basicConfig(level=log_level.upper(), handlers=[QueueHandler(log_queue)])
+    # uvicorn's per-request access line is the same kind of hot-path write.
+    access_log = _env_flag("GRIMOIRE_ACCESS_LOG", "0")
+    listener.start()
+    try:
+        uvicorn.run(app, host="127.0.0.1", port=8000, log_level=log_level.lower(), access_log=access_log)
+    finally:
+        listener.stop()
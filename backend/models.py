@@ -19,7 +19,7 @@ def _timestamp() -> float:
     return time.time()
 
 
-@dataclass
+@dataclass(slots=True)
 class NoteRecord:
     """Represents a stored note or folder."""
 
@@ -32,6 +32,10 @@ class NoteRecord:
     created_at: float = field(default_factory=_timestamp)
     updated_at: float = field(default_factory=_timestamp)
 
+    def __post_init__(self):
+        # Index paths compare kinds by identity; coerce plain strings.
+        self.kind = NoteKind(self.kind)
+
 
 # API payloads
 
@@ -7,39 +7,35 @@ project.
 
 from __future__ import annotations
 
-import json
+import errno
+import os
 import re
 import shutil
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from jsonio import read_json, replace_atomically, write_json
 
-@dataclass(frozen=True)
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9 _.-]+")
+_WHITESPACE_RUN = re.compile(r"\\s+")
+
+
+@dataclass(frozen=True, slots=True)
 class ProjectInfo:
     name: str
     root: Path
+    # Derived from `root` once at construction; requests read these constantly.
+    notes_dir: Path = field(init=False, repr=False, compare=False)
+    attachments_dir: Path = field(init=False, repr=False, compare=False)
+    search_dir: Path = field(init=False, repr=False, compare=False)
+    context_dir: Path = field(init=False, repr=False, compare=False)
+    glossary_dir: Path = field(init=False, repr=False, compare=False)
 
-    @property
-    def notes_dir(self) -> Path:
-        return self.root / "notes"
-
-    @property
-    def attachments_dir(self) -> Path:
-        return self.root / "attachments"
-
-    @property
-    def search_dir(self) -> Path:
-        return self.root / "search"
-
-    @property
-    def context_dir(self) -> Path:
-        return self.root / "context"
-
-    @property
-    def glossary_dir(self) -> Path:
-        return self.root / "glossary"
+    def __post_init__(self):
+        for sub in ("notes", "attachments", "search", "context", "glossary"):
+            object.__setattr__(self, f"{sub}_dir", self.root / sub)
 
 
 class ProjectManager:
@@ -59,18 +55,19 @@ class ProjectManager:
     # Public API
     # ------------------------------------------------------------------
     def list_projects(self) -> List[ProjectInfo]:
-        projects: List[ProjectInfo] = []
-        for path in sorted(self._projects_dir.glob("*.grim")):
-            if path.is_dir():
-                projects.append(ProjectInfo(name=path.name, root=path))
-        return projects
+        paths = sorted(self._project_dirs())
+        return [ProjectInfo(name=path.name, root=path) for path in paths]
 
     def active_project(self) -> ProjectInfo:
         state = self._read_state()
         if state:
             path = Path(state.get("path", "")).expanduser()
-            if path.exists() and path.is_dir() and path.suffix == ".grim":
-                return self.ensure_layout(ProjectInfo(name=path.name, root=path.resolve()))
+            if path.suffix == ".grim" and path.is_dir():
+                # `_write_state` stores resolved roots; only older or
+                # hand-edited state needs resolving here.
+                if not path.is_absolute():
+                    path = path.resolve()
+                return self.ensure_layout(ProjectInfo(name=path.name, root=path))
 
         projects = self.list_projects()
         if projects:
@@ -83,8 +80,10 @@ class ProjectManager:
         return project
 
     def create_project(self, name: str) -> ProjectInfo:
+        # A sanitized name is one plain component under the resolved projects
+        # dir, so the joined path needs no resolving.
         safe = self._sanitize_project_name(name)
-        root = (self._projects_dir / safe).resolve()
+        root = self._projects_dir / safe
         root.mkdir(parents=True, exist_ok=True)
         project = self.ensure_layout(ProjectInfo(name=root.name, root=root))
         self._write_state(project)
@@ -93,7 +92,7 @@ class ProjectManager:
     def open_project(self, name: Optional[str] = None, path: Optional[str] = None) -> ProjectInfo:
         if path:
             candidate = Path(path).expanduser().resolve()
-            if candidate.suffix != ".grim" or not candidate.exists() or not candidate.is_dir():
+            if candidate.suffix != ".grim" or not candidate.is_dir():
                 raise FileNotFoundError(f"Project not found: {path}")
             project = self.ensure_layout(ProjectInfo(name=candidate.name, root=candidate))
             self._write_state(project)
@@ -103,7 +102,7 @@ class ProjectManager:
             raise ValueError("Must provide project name or path")
 
         safe = self._sanitize_project_name(name)
-        candidate = (self._projects_dir / safe).resolve()
+        candidate = self._projects_dir / safe
         if not candidate.exists():
             raise FileNotFoundError(f"Project not found: {safe}")
         project = self.ensure_layout(ProjectInfo(name=candidate.name, root=candidate))
@@ -127,8 +126,8 @@ class ProjectManager:
         if not trimmed:
             trimmed = "Untitled"
         # Allow letters/numbers/space/dash/underscore, convert everything else to '-'.
-        slug = re.sub(r"[^A-Za-z0-9 _.-]+", "-", trimmed).strip()
-        slug = re.sub(r"\\s+", " ", slug).strip()
+        slug = _UNSAFE_NAME_CHARS.sub("-", trimmed).strip()
+        slug = _WHITESPACE_RUN.sub(" ", slug).strip()
         slug = slug.replace(" ", "-")
         if not slug.lower().endswith(".grim"):
             slug += ".grim"
@@ -139,22 +138,24 @@ class ProjectManager:
 
     def _read_state(self) -> Optional[Dict]:
         try:
-            if self._state_path.exists():
-                with open(self._state_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
+            return read_json(self._state_path)
         except Exception:
             return None
-        return None
 
     def _write_state(self, project: ProjectInfo) -> None:
         payload = {"path": str(project.root), "updated_at": time.time()}
-        self._state_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self._state_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
+        replace_atomically(self._state_path, lambda tmp_path: write_json(tmp_path, payload))
+
+    def _project_dirs(self):
+        # DirEntry carries the file type from the listing; no stat per project.
+        with os.scandir(self._projects_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".grim") and entry.is_dir():
+                    yield Path(entry.path)
 
     def _ensure_default_project(self) -> None:
         # If there are already projects, do nothing.
-        if any(self._projects_dir.glob("*.grim")):
+        if any(self._project_dirs()):
             return
 
         default = self.create_project("Default")
@@ -164,22 +165,30 @@ class ProjectManager:
         """Best-effort migration from legacy `backend/storage/*` layout."""
 
         notes_src = (self._legacy_storage_dir / "notes").resolve()
-        if notes_src.exists() and notes_src.is_dir():
+        if notes_src.is_dir():
             try:
                 if not any(project.notes_dir.iterdir()):
                     # Move notes directory into the project to avoid duplicate storage.
                     shutil.rmtree(project.notes_dir, ignore_errors=True)
                     shutil.move(str(notes_src), str(project.notes_dir))
                 else:
-                    # Merge/copy as a fallback.
-                    for item in notes_src.iterdir():
-                        dest = project.notes_dir / item.name
-                        if dest.exists():
-                            continue
-                        if item.is_dir():
-                            shutil.copytree(item, dest)
-                        else:
-                            shutil.copy2(item, dest)
+                    # Merge as a fallback: rename each entry in, copying only
+                    # when the legacy dir sits on another filesystem.
+                    with os.scandir(notes_src) as items:
+                        for item in items:
+                            dest = project.notes_dir / item.name
+                            if dest.exists():
+                                continue
+                            try:
+                                os.rename(item.path, dest)
+                                continue
+                            except OSError as exc:
+                                if exc.errno != errno.EXDEV:
+                                    raise
+                            if item.is_dir():
+                                shutil.copytree(item.path, dest)
+                            else:
+                                shutil.copy2(item.path, dest)
             except Exception:
                 pass
 
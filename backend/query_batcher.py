@@ -0,0 +1,87 @@
+"""Micro-batching of concurrent search requests."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+from executors import run_in_embed_pool
+from models import SearchHitPayload, SearchRequest
+
+
+class QueryBatcher:
+    """Collects concurrent searches and runs them as one `search_many` call.
+
+    A background task takes the first queued request, waits up to `max_wait`
+    seconds (or until `max_batch` requests are queued) for more, then embeds
+    and queries the whole batch at once and resolves each caller's future
+    with its own results. The task is started on first use so it always
+    belongs to the running event loop.
+    """
+
+    def __init__(self, max_batch: int = 32, max_wait: float = 0.01):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, service, request: SearchRequest) -> List[SearchHitPayload]:
+        """Queue `request` against `service` and wait for its results."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((service, request, future))
+        return await future
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._queue = None
+        self._loop = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch) -> None:
+        # Requests can straddle a project switch; keep each service's batch apart.
+        by_service = {}
+        for service, request, future in batch:
+            by_service.setdefault(id(service), (service, []))[1].append((request, future))
+
+        for service, items in by_service.values():
+            try:
+                if len(items) == 1:
+                    results = [await run_in_embed_pool(service.search, items[0][0])]
+                else:
+                    results = await run_in_embed_pool(
+                        service.search_many, [request for request, _ in items]
+                    )
+            except Exception as exc:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), hits in zip(items, results):
+                if not future.done():
+                    future.set_result(hits)
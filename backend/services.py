@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+import heapq
+import logging
+import os
+import threading
 import time
-from typing import Iterable, List
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional
 
 from chunker import Chunker
 from context_models import ContextRequest
 from context_service import ContextService
 from glossary_service import GlossaryService
 from embedder import Embedder
+from hashing import content_key
 from indexer import Indexer
 from models import (
     CreateFolderRequest,
@@ -22,6 +29,49 @@ from models import (
 )
 from storage import NoteStorage
 
+logger = logging.getLogger(__name__)
+
+# NoteRecord coerces `kind` to a NoteKind member, so the index paths can
+# compare by identity against a module-level binding.
+_NOTE_KIND = NoteKind.NOTE
+
+
+def _rebuild_batch_size() -> int:
+    return max(1, int(os.environ.get("GRIMOIRE_EMBED_BATCH_SIZE", "64")))
+
+
+def _query_cache_size() -> int:
+    return max(0, int(os.environ.get("GRIMOIRE_QUERY_CACHE_SIZE", "1024")))
+
+
+class _EmbeddingCache:
+    """Thread-safe LRU of query chunk embeddings.
+
+    Keys are `(model, digest)` pairs, so switching embedding models never
+    serves a stale vector and long chunk texts are not kept alive as keys.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+            return vector
+
+    def put(self, key: tuple, vector: List[float]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = vector
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
 
 class SearchService:
     """Wraps chunking, embedding, and vector index operations."""
@@ -35,89 +85,239 @@ class SearchService:
         self.chunker = chunker or Chunker()
         self.embedder = embedder or Embedder()
         self.indexer = indexer or Indexer()
+        self._query_cache = _EmbeddingCache(_query_cache_size())
 
     def search(self, request: SearchRequest) -> List[SearchHitPayload]:
-        if not request.text.strip():
-            return []
-
-        chunks = self.chunker.chunk(request.text, request.note_id)
-        if not chunks:
-            return []
-
-        embeddings = [self.embedder.embed(chunk["text"]) for chunk in chunks]
-        results: List[SearchHitPayload] = []
-
-        for embedding in embeddings:
-            matches = self.indexer.search(
-                embedding, exclude_note_id=request.note_id, top_k=5
-            )
-
-            for match in matches:
-                results.append(
-                    SearchHitPayload(
-                        note_id=match["note_id"],
-                        chunk_id=match["chunk_id"],
-                        text=match["excerpt"],
-                        score=float(match["score"]),
-                    )
+        return self.search_many([request])[0]
+
+    def search_many(self, requests: List[SearchRequest]) -> List[List[SearchHitPayload]]:
+        """Run several searches with one embed call and one index query per note.
+
+        Results come back in request order, each shaped like `search`.
+        """
+        chunked = [
+            self.chunker.chunk(request.text, request.note_id) if request.text.strip() else []
+            for request in requests
+        ]
+        texts = [chunk["text"] for chunks in chunked for chunk in chunks]
+        if not texts:
+            return [[] for _ in requests]
+
+        embeddings = self._embed_queries(texts)
+
+        # Each request excludes its own note, so query the index once per note.
+        rows_by_note: Dict[str, List[int]] = {}
+        row = 0
+        for request, chunks in zip(requests, chunked):
+            if chunks:
+                rows_by_note.setdefault(request.note_id, []).extend(
+                    range(row, row + len(chunks))
                 )
+            row += len(chunks)
 
+        matches_by_row: List[List[dict]] = [[] for _ in texts]
+        for note_id, rows in rows_by_note.items():
+            batch = self.indexer.search_batch(
+                [embeddings[i] for i in rows], exclude_note_id=note_id, top_k=5
+            )
+            for i, matches in zip(rows, batch):
+                matches_by_row[i] = matches
+
+        results = []
+        row = 0
+        for chunks in chunked:
+            results.append(self._merge_hits(matches_by_row[row : row + len(chunks)]))
+            row += len(chunks)
+        return results
+
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed query chunks, serving repeats from the LRU cache.
+
+        Only chunks that miss the cache go through the model, in one batch.
+        """
+        model = self._model_name()
+        keys = {text: (model, content_key(text)) for text in texts}
+        known = {}
+        for text, key in keys.items():
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                known[text] = vector
+
+        missing = [text for text in keys if text not in known]
+        if missing:
+            for text, vector in zip(missing, self.embedder.embed_batch(missing)):
+                known[text] = vector
+                self._query_cache.put(keys[text], vector)
+        return [known[text] for text in texts]
+
+    @staticmethod
+    def _merge_hits(match_lists: List[List[dict]]) -> List[SearchHitPayload]:
+        # Dedupe on the raw index matches; only the final top ten become payloads.
         deduped = {}
-        for hit in results:
-            key = (hit.note_id, hit.chunk_id)
-            if key not in deduped or hit.score > deduped[key].score:
-                deduped[key] = hit
-
-        sorted_hits = sorted(deduped.values(), key=lambda h: h.score, reverse=True)
-        return sorted_hits[:10]
+        for matches in match_lists:
+            for match in matches:
+                key = (match["note_id"], match["chunk_id"])
+                best = deduped.get(key)
+                if best is None or match["score"] > best["score"]:
+                    deduped[key] = match
+
+        # Index metadata is already typed; construct without re-validating.
+        return [
+            SearchHitPayload.model_construct(
+                note_id=match["note_id"],
+                chunk_id=match["chunk_id"],
+                text=match["excerpt"],
+                score=float(match["score"]),
+            )
+            for match in heapq.nlargest(10, deduped.values(), key=itemgetter("score"))
+        ]
 
     def index_note(self, record: NoteRecord) -> int:
         """Index a note's content. Returns number of chunks processed."""
-        if record.kind != NoteKind.NOTE:
+        if record.kind is not _NOTE_KIND:
             return 0
 
         if not record.content.strip():
             self.indexer.delete_note(record.id)
             return 0
 
+        # Re-saves, reindexes after renames and moves, and deferred reindexes
+        # often carry exactly the text already indexed; skip chunking and the
+        # index rewrite when every stored chunk was built from this content.
+        note_key = content_key(record.content)
+        indexed = self.indexer.get_note_chunks(record.id)
+        model = self._model_name()
+        if indexed and all(
+            chunk.get("content_key") == note_key and chunk.get("model") == model
+            for chunk in indexed
+        ):
+            return len(indexed)
+
         chunks = self.chunker.chunk(record.content, record.id)
-        chunk_embeddings = []
-        for chunk in chunks:
-            embedding = self.embedder.embed(chunk["text"])
-            chunk_embeddings.append(
-                {
-                    "chunk_id": chunk["chunk_id"],
-                    "text": chunk["text"],
-                    "embedding": embedding,
-                }
-            )
+        embeddings = self._embed_reusing_indexed(record.id, chunks)
+        return self._update_index(record.id, chunks, embeddings, note_key)
+
+    def rename_note(self, old_id: str, record: NoteRecord) -> int:
+        """Move a note's index entries from `old_id` to `record.id`.
+
+        Chunk ids embed the note id, so the chunks are rewritten, but their
+        vectors come from the old entries instead of the model.
+        """
+        chunks = []
+        if record.kind is _NOTE_KIND and record.content.strip():
+            chunks = self.chunker.chunk(record.content, record.id)
+        embeddings = self._embed_reusing_indexed(old_id, chunks)
+        self.delete_notes([old_id])
+        if not chunks:
+            return 0
+        return self._update_index(record.id, chunks, embeddings, content_key(record.content))
+
+    def _embed_reusing_indexed(self, note_id: str, chunks: List[dict]) -> List[List[float]]:
+        """Embed chunk texts, reusing stored vectors for text the note already had.
+
+        The index metadata keeps each chunk's text and embedding, so a save that
+        touches one paragraph only sends the chunks that actually differ through
+        the model. Vectors from a different embedding model are never reused.
+        """
+        known = self._reusable(
+            self.indexer.get_note_embeddings(note_id, model=self._model_name())
+        )
+        return self._embed_texts([chunk["text"] for chunk in chunks], known)
+
+    def _model_name(self):
+        return getattr(self.embedder, "model_name", None)
+
+    def _reusable(self, embeddings: Dict[str, List[float]]) -> Dict[str, List[float]]:
+        if not embeddings:
+            return {}
+        dim = self.embedder.get_embedding_dim()
+        return {text: vector for text, vector in embeddings.items() if len(vector) == dim}
+
+    def _embed_texts(
+        self, texts: List[str], known: Dict[str, List[float]], batch_size: int | None = None
+    ) -> List[List[float]]:
+        """Embed the texts missing from `known` (in batches) and return all vectors."""
+        missing = list(dict.fromkeys(text for text in texts if text not in known))
+        step = batch_size or len(missing) or 1
+        for start in range(0, len(missing), step):
+            batch = missing[start : start + step]
+            known.update(zip(batch, self.embedder.embed_batch(batch)))
+        return [known[text] for text in texts]
+
+    def _update_index(
+        self, note_id: str, chunks: List[dict], embeddings, note_key: Optional[str] = None
+    ) -> int:
+        model = self._model_name()
+        chunk_embeddings = [
+            {
+                "chunk_id": chunk["chunk_id"],
+                "text": chunk["text"],
+                "embedding": embedding,
+                "model": model,
+                "content_key": note_key,
+            }
+            for chunk, embedding in zip(chunks, embeddings)
+        ]
 
         try:
-            self.indexer.update_note(record.id, chunk_embeddings)
+            self.indexer.update_note(note_id, chunk_embeddings)
         except Exception as exc:
-            print(f"Index update failed for {record.id}: {exc}")
+            logger.warning("Index update failed for %s: %s", note_id, exc)
         return len(chunk_embeddings)
 
+    def flush(self) -> bool:
+        """Write buffered index changes to disk."""
+        return self.indexer.flush()
+
     def delete_notes(self, note_ids: Iterable[str]):
         for note_id in note_ids:
             try:
                 self.indexer.delete_note(note_id)
             except Exception as exc:
-                print(f"Index cleanup failed for {note_id}: {exc}")
+                logger.warning("Index cleanup failed for %s: %s", note_id, exc)
 
     def rebuild(self, records: Iterable[NoteRecord]) -> int:
         processed = 0
+        # Chunks whose text is already indexed under the current model keep
+        # their stored vectors, so rebuilds after renames or small edits only
+        # embed what actually changed.
+        try:
+            known = self._reusable(self.indexer.get_all_embeddings(model=self._model_name()))
+        except Exception as exc:
+            logger.warning("Reading stored embeddings failed: %s", exc)
+            known = {}
         try:
             self.indexer.clear()
         except Exception as exc:
-            print(f"Index clear failed: {exc}")
+            logger.warning("Index clear failed: %s", exc)
 
+        # Chunk every note first so embedding runs over full batches that span
+        # note boundaries instead of one short forward pass per note.
+        chunked = []
         for record in records:
-            if record.kind != NoteKind.NOTE or not record.content.strip():
+            if record.kind is not _NOTE_KIND or not record.content.strip():
                 continue
-            self.index_note(record)
+            chunks = self.chunker.chunk(record.content, record.id)
+            chunked.append((record.id, chunks, content_key(record.content)))
+
+        texts = [chunk["text"] for _, chunks, _ in chunked for chunk in chunks]
+        reused = sum(1 for text in texts if text in known)
+        embeddings = self._embed_texts(texts, known, _rebuild_batch_size())
+
+        offset = 0
+        for note_id, chunks, note_key in chunked:
+            self._update_index(
+                note_id, chunks, embeddings[offset : offset + len(chunks)], note_key
+            )
+            offset += len(chunks)
             processed += 1
 
+        logger.info(
+            "Rebuilt search index: %d notes, %d chunks (%d reused)",
+            processed,
+            len(texts),
+            reused,
+        )
         return processed
 
 
@@ -135,6 +335,9 @@ class NoteService:
         self.search = search or SearchService()
         self.context = context or ContextService()
         self.glossary = glossary
+        # Writes may now arrive concurrently from the embed pool; serialize them so
+        # storage and the indexes see one mutation at a time.
+        self._write_lock = threading.RLock()
 
     def tree(self) -> NotesResponsePayload:
         return self.storage.get_tree()
@@ -144,63 +347,120 @@ class NoteService:
         return NoteContentPayload(note_id=record.id, title=record.title, content=record.content)
 
     def save_note(self, request) -> NoteRecord:
-        record, _ = self.storage.save_note_content(
-            request.note_id, request.content, request.parent_id
-        )
+        with self._write_lock:
+            record, changed = self.write_note(request)
+            if changed:
+                self._index_record(record)
+            return record
+
+    def write_note(self, request) -> tuple[NoteRecord, bool]:
+        """Persist note content without indexing it.
+
+        Returns the record and whether anything was written; callers that defer
+        indexing follow up with `reindex_note`.
+        """
+        with self._write_lock:
+            # Autosave frequently re-sends identical content; skip the rewrite and
+            # the chunk/embed/index pipeline when nothing changed.
+            current = self._unchanged_note(request)
+            if current is not None:
+                return current, False
+
+            record, _ = self.storage.save_note_content(
+                request.note_id, request.content, request.parent_id
+            )
+            return record, True
+
+    def reindex_note(self, note_id: str) -> None:
+        """Index the latest stored content for a note, if it still exists."""
+        with self._write_lock:
+            try:
+                record = self.storage.get_note(note_id)
+            except FileNotFoundError:
+                return
+            self._index_record(record)
+
+    def _index_record(self, record: NoteRecord) -> None:
         self.search.index_note(record)
         self.context.index_note(record)
         if self.glossary is not None:
             self.glossary.update_for_note(record.id)
-        return record
+
+    def _unchanged_note(self, request) -> NoteRecord | None:
+        try:
+            current = self.storage.get_note(request.note_id)
+        except FileNotFoundError:
+            return None
+        if current.kind is not _NOTE_KIND or current.content != request.content:
+            return None
+        if request.parent_id and request.parent_id != current.parent_id:
+            return None
+        return current
 
     def create_note(self, request: CreateNoteRequest) -> NoteRecord:
-        record, _ = self.storage.save_note_content(
-            request.note_id,
-            request.content,
-            request.parent_id,
-        )
-        if request.title:
-            record.title = request.title
-            record.updated_at = time.time()
-            self.storage._write_record(record)
-        self.search.index_note(record)
-        self.context.index_note(record)
-        if self.glossary is not None:
-            self.glossary.update_for_note(record.id)
-        return record
+        with self._write_lock:
+            record, _ = self.storage.save_note_content(
+                request.note_id,
+                request.content,
+                request.parent_id,
+            )
+            if request.title:
+                record.title = request.title
+                record.updated_at = time.time()
+                self.storage._write_record(record)
+            self._index_record(record)
+            return record
 
     def create_folder(self, request: CreateFolderRequest) -> NoteRecord:
-        folder, _ = self.storage.create_folder(request.folder_path)
-        return folder
+        with self._write_lock:
+            folder, _ = self.storage.create_folder(request.folder_path)
+            return folder
 
     def delete_item(self, note_id: str) -> List[str]:
-        deleted_ids = self.storage.delete_item(note_id)
-        self.search.delete_notes(deleted_ids)
-        self.context.delete_notes(deleted_ids)
-        if self.glossary is not None:
-            self.glossary.delete_notes(deleted_ids)
-        return deleted_ids
+        with self._write_lock:
+            deleted_ids = self.storage.delete_item(note_id)
+            self.search.delete_notes(deleted_ids)
+            self.context.delete_notes(deleted_ids)
+            if self.glossary is not None:
+                self.glossary.delete_notes(deleted_ids)
+            return deleted_ids
 
     def rename_item(self, old_id: str, new_id: str) -> str:
-        new_root = self.storage.rename_item(old_id, new_id)
-        records = self.storage.list_records()
-        self.search.rebuild(records.values())
-        self.context.rebuild(records.values())
-        if self.glossary is not None:
-            self.glossary.rebuild()
-        return new_root
+        with self._write_lock:
+            new_root, renamed = self.storage.rename_subtree(old_id, new_id)
+            moved = {old: new for old, new in renamed.items() if old != new}
+            if not moved:
+                return new_root
+            # Only the renamed notes change ids; re-key their index entries
+            # (reusing stored vectors) instead of rebuilding every index.
+            records = self.storage.list_records()
+            notes = {
+                old: records[new]
+                for old, new in moved.items()
+                if new in records and records[new].kind is _NOTE_KIND
+            }
+            for old, record in notes.items():
+                self.search.rename_note(old, record)
+                self.context.rename_note(old, record)
+            if self.glossary is not None and notes:
+                self.glossary.delete_notes(notes.keys())
+                for record in notes.values():
+                    self.glossary.update_for_note(record.id)
+            return new_root
 
     def move_item(self, note_id: str, parent_id: str | None) -> NoteRecord:
-        record = self.storage.move_item(note_id, parent_id)
-        # Id is stable; no need to rebuild semantic index.
-        return record
+        with self._write_lock:
+            record = self.storage.move_item(note_id, parent_id)
+            # Id is stable; no need to rebuild semantic index.
+            return record
 
     def rebuild_index(self) -> int:
-        records = self.storage.list_records()
-        self.context.rebuild(records.values())
-        if self.glossary is not None:
-            self.glossary.rebuild()
-        return self.search.rebuild(records.values())
+        with self._write_lock:
+            records = self.storage.list_records()
+            self.context.rebuild(records.values())
+            if self.glossary is not None:
+                self.glossary.rebuild()
+            return self.search.rebuild(records.values())
 
     def semantic_context(self, request: ContextRequest):
         # Lazy bootstrap: if the user has an existing corpus, build the context index
@@ -2,28 +2,87 @@
 
 from __future__ import annotations
 
-import json
+import functools
+import os
+import secrets
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+from jsonio import BUFFER_SIZE, dumps_line, loads, read_json, write_json
 from models import NoteKind, NoteNodePayload, NoteRecord, NotesResponsePayload
 
+# Cold-start cache of every record file, one JSON object per line. It does not
+# match the "*.json" record pattern, so it is never mistaken for a note.
+_SNAPSHOT_NAME = ".records.ndjson"
+_NOTE_SUFFIX = ".json"
+_FOLDER_SUFFIX = ".folder.json"
+# Below this many files to parse, a thread pool costs more than it saves.
+_PARALLEL_READ_MIN = 32
+
+
+def _safe_stem(note_id: str) -> str:
+    return note_id.strip().strip("/").replace("/", "__")
+
+
+@functools.lru_cache(maxsize=4096)
+def _record_path(notes_dir: Path, note_id: str, kind: NoteKind) -> Path:
+    """Record file path for `note_id`; memoized since autosave asks on every write.
+
+    `notes_dir` is part of the key, so switching projects needs no invalidation.
+    """
+    suffix = _FOLDER_SUFFIX if kind == NoteKind.FOLDER else _NOTE_SUFFIX
+    return notes_dir / f"{_safe_stem(note_id)}{suffix}"
+
+
+def _scan_workers() -> int:
+    return max(1, int(os.environ.get("GRIMOIRE_NOTES_SCAN_WORKERS", "8")))
+
 
 class NoteStorage:
     """Local JSON storage with hierarchical helpers."""
 
-    def __init__(self, root: Optional[Path] = None):
+    def __init__(self, root: Optional[Path] = None, sync_delay: Optional[float] = None):
+        """
+        Args:
+            root: Directory holding the note JSON files.
+            sync_delay: Seconds to batch fsyncs of written notes; 0 syncs every
+                        write. Defaults to `GRIMOIRE_NOTES_SYNC_DELAY` (0.5).
+        """
         base_dir = Path(root) if root else Path(__file__).resolve().parent / "storage" / "notes"
         base_dir.mkdir(parents=True, exist_ok=True)
         self.notes_dir = base_dir
+        # All records, loaded from disk once and kept in sync by the write paths
+        # in this class. Replaced wholesale on update so concurrent readers never
+        # see a dict that is being mutated.
+        self._records: Optional[Dict[str, NoteRecord]] = None
+        # Parent -> child and child -> parent ids for the current `_records`
+        # dict, rebuilt only when that dict is replaced so subtree and referrer
+        # lookups do not rescan every record.
+        self._links: Optional[
+            Tuple[Dict[str, NoteRecord], Dict[str, List[str]], Dict[str, Set[str]]]
+        ] = None
+        # Bumped whenever `_records` is replaced after a write, so callers can
+        # tell cheaply whether the tree changed since they last looked. The
+        # counter restarts with each instance; `instance_id` tells revisions of
+        # different instances (server restarts, project reopens) apart.
+        self.revision = 0
+        self.instance_id = secrets.token_hex(4)
+        if sync_delay is None:
+            sync_delay = float(os.environ.get("GRIMOIRE_NOTES_SYNC_DELAY", "0.5"))
+        self.sync_delay = max(0.0, sync_delay)
+        self._unsynced: Set[Path] = set()
+        self._sync_lock = threading.Lock()
+        self._sync_timer: Optional[threading.Timer] = None
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
     def get_tree(self) -> NotesResponsePayload:
-        records = self._load_all_records()
+        records = self._cached_records()
         nodes = {rid: self._to_node(record) for rid, record in records.items()}
 
         # Build parent/child relationships
@@ -69,7 +128,7 @@ class NoteStorage:
         # causes child items to be missing from client-side trees.
         all_nodes = list(nodes.values())
         all_nodes.sort(key=lambda n: n.title.lower())
-        return NotesResponsePayload(notes=all_nodes)
+        return NotesResponsePayload.model_construct(notes=all_nodes)
 
     def list_records(self) -> Dict[str, NoteRecord]:
         """Expose all records for services that need to rebuild derived state."""
@@ -77,52 +136,52 @@ class NoteStorage:
 
     def get_note(self, note_id: str) -> NoteRecord:
         normalized = self._normalize_id(note_id)
-        candidates = self._candidate_paths(normalized)
-        for path, kind in candidates:
-            if path.exists():
-                return self._read_record(path, normalized, kind)
-        raise FileNotFoundError(f"Note not found: {note_id}")
+        # The record cache mirrors the notes directory, so a miss needs no stat.
+        cached = self._cached_records().get(normalized)
+        if cached is None:
+            raise FileNotFoundError(f"Note not found: {note_id}")
+        return self._copy(cached)
 
     def save_note_content(
         self, note_id: str, content: str, parent_id: Optional[str]
     ) -> Tuple[NoteRecord, bool]:
         normalized = self._normalize_id(note_id)
-        records = self._load_all_records()
-        existing = records.get(normalized)
+        # Autosave lands here on every edit: copy and write only this record
+        # rather than copying and diffing every record.
+        existing = self._cached_records().get(normalized)
         is_new = existing is None
+        derived_parent = self._derive_parent_id(normalized)
 
-        record = existing or NoteRecord(
-            id=normalized,
-            title=self._title_from_id(normalized),
-            kind=NoteKind.NOTE,
-            parent_id=parent_id or self._derive_parent_id(normalized),
-        )
+        if is_new:
+            record = NoteRecord(
+                id=normalized,
+                title=self._title_from_id(normalized),
+                kind=NoteKind.NOTE,
+            )
+        else:
+            record = self._copy(existing)
 
         record.content = content
-        record.parent_id = parent_id or record.parent_id or self._derive_parent_id(
-            normalized
-        )
+        record.parent_id = parent_id or record.parent_id or derived_parent
+        now = time.time()
         if is_new:
-            record.created_at = time.time()
-        record.updated_at = time.time()
+            record.created_at = now
+        record.updated_at = now
 
-        records[record.id] = record
-        self._persist_all(records)
+        self._write_record(record)
         self._ensure_parent_link(record)
         return record, is_new
 
     def create_folder(self, folder_path: str) -> Tuple[NoteRecord, bool]:
         normalized = self._normalize_id(folder_path)
-        records = self._load_all_records()
-        existing = records.get(normalized)
+        existing = self._cached_records().get(normalized)
         is_new = existing is None
 
-        folder = existing or NoteRecord(
+        folder = self._copy(existing) if existing else NoteRecord(
             id=normalized,
             title=self._title_from_id(normalized),
             kind=NoteKind.FOLDER,
             parent_id=self._derive_parent_id(normalized),
-            children=list(existing.children if existing else []),
         )
 
         # Ensure folder location is derived from its path-style id.
@@ -131,41 +190,46 @@ class NoteStorage:
             folder.created_at = time.time()
         folder.updated_at = time.time()
 
-        records[folder.id] = folder
-        self._persist_all(records)
+        self._write_record(folder)
         self._ensure_parent_link(folder)
 
         return folder, is_new
 
     def delete_item(self, note_id: str) -> List[str]:
         normalized = self._normalize_id(note_id)
-        records = self._load_all_records()
+        records = self._cached_records()
         if normalized not in records:
             raise FileNotFoundError(f"Note or folder not found: {note_id}")
 
-        targets = self._collect_descendants(normalized, records)
-        deleted_ids: List[str] = []
+        targets = self._collect_descendants(normalized)
+        doomed = set(targets)
 
-        # Update parents before deleting
-        for record in list(records.values()):
-            if record.children:
-                record.children = [cid for cid in record.children if cid not in targets]
-                records[record.id] = record
+        # Update parents before deleting; only records that list a target change.
+        updated = [
+            replace(record, children=[cid for cid in record.children if cid not in doomed])
+            for record in (records.get(rid) for rid in self._referrers(doomed))
+            if record is not None and any(cid in doomed for cid in record.children)
+        ]
 
-        for target_id in targets:
-            record = records.pop(target_id, None)
-            if record:
-                deleted_ids.append(target_id)
-                for path, _ in self._candidate_paths(target_id):
-                    if path.exists():
-                        path.unlink()
-
-        self._persist_all(records)
+        deleted_ids = [target_id for target_id in targets if target_id in records]
+        for target_id in deleted_ids:
+            for path, _ in self._candidate_paths(target_id):
+                path.unlink(missing_ok=True)
+
+        self._apply_changes(updated, deleted_ids)
         return deleted_ids
 
     def rename_item(self, old_id: str, new_name: str) -> str:
+        return self.rename_subtree(old_id, new_name)[0]
+
+    def rename_subtree(self, old_id: str, new_name: str) -> Tuple[str, Dict[str, str]]:
+        """Rename an item and its subtree.
+
+        Returns the new root id and an old -> new id map for the root and every
+        descendant, so callers can re-key derived state instead of rebuilding it.
+        """
         normalized_old = self._normalize_id(old_id)
-        records = self._load_all_records()
+        records = self._cached_records()
         if normalized_old not in records:
             raise FileNotFoundError(f"Note or folder not found: {old_id}")
 
@@ -180,9 +244,9 @@ class NoteStorage:
             )
 
         if normalized_new_root == normalized_old:
-            return normalized_old
+            return normalized_old, {normalized_old: normalized_old}
 
-        targets = self._collect_descendants(normalized_old, records)
+        targets = set(self._collect_descendants(normalized_old))
 
         def rebase(identifier: Optional[str]) -> Optional[str]:
             if identifier is None:
@@ -194,8 +258,15 @@ class NoteStorage:
                 return normalized_new_root + identifier[len(normalized_old) :]
             return identifier
 
-        updated_records: Dict[str, NoteRecord] = {}
-        for current_id, record in records.items():
+        # Only the subtree and records pointing into it change; everything else
+        # keeps its file and its updated_at.
+        affected = [
+            records[rid] for rid in targets | self._referrers(targets) if rid in records
+        ]
+
+        now = time.time()
+        updated_records: List[NoteRecord] = []
+        for record in affected:
             new_id = rebase(record.id) if record.id in targets else record.id
             new_parent = rebase(record.parent_id)
             new_children = [rebase(child) or child for child in record.children]
@@ -208,10 +279,9 @@ class NoteStorage:
                 title=new_title,
                 parent_id=new_parent,
                 children=new_children,
-                updated_at=time.time(),
+                updated_at=now,
             )
-
-            updated_records[new_id] = updated
+            updated_records.append(updated)
 
         # Remove old files for moved items
         for target_id in targets:
@@ -219,11 +289,12 @@ class NoteStorage:
                 continue
             original_record = records[target_id]
             for path, _ in self._candidate_paths(original_record.id, original_record.kind):
-                if path.exists():
-                    path.unlink()
+                path.unlink(missing_ok=True)
 
-        self._persist_all(updated_records)
-        return normalized_new_root
+        self._apply_changes(
+            updated_records, [tid for tid in targets if tid != normalized_new_root]
+        )
+        return normalized_new_root, {tid: rebase(tid) for tid in targets}
 
     def move_item(self, note_id: str, parent_id: Optional[str]) -> NoteRecord:
         """Move an existing note or folder by updating parent_id.
@@ -233,25 +304,33 @@ class NoteStorage:
         normalized_id = self._normalize_id(note_id)
         normalized_parent = self._normalize_id(parent_id) if parent_id else None
 
-        records = self._load_all_records()
+        records = self._cached_records()
         if normalized_id not in records:
             raise FileNotFoundError(f"Note or folder not found: {note_id}")
 
-        record = records[normalized_id]
+        # Only the item and its old and new parents change.
+        record = self._copy(records[normalized_id])
         old_parent_id = record.parent_id
+        changed: Dict[str, NoteRecord] = {}
 
         # Remove from old parent
         if old_parent_id and old_parent_id in records:
             old_parent = records[old_parent_id]
             if record.id in old_parent.children:
+                old_parent = self._copy(old_parent)
                 old_parent.children = [cid for cid in old_parent.children if cid != record.id]
                 old_parent.updated_at = time.time()
-                records[old_parent.id] = old_parent
+                changed[old_parent.id] = old_parent
 
         # Add to new parent
         if normalized_parent:
-            parent_record = records.get(normalized_parent)
-            if not parent_record:
+            if normalized_parent == record.id:
+                parent_record = record
+            elif normalized_parent in changed:
+                parent_record = changed[normalized_parent]
+            elif normalized_parent in records:
+                parent_record = self._copy(records[normalized_parent])
+            else:
                 parent_record = NoteRecord(
                     id=normalized_parent,
                     title=self._title_from_id(normalized_parent),
@@ -261,13 +340,13 @@ class NoteStorage:
             if record.id not in parent_record.children:
                 parent_record.children.append(record.id)
             parent_record.updated_at = time.time()
-            records[parent_record.id] = parent_record
+            changed[parent_record.id] = parent_record
 
         record.parent_id = normalized_parent
         record.updated_at = time.time()
-        records[record.id] = record
+        changed[record.id] = record
 
-        self._persist_all(records)
+        self._apply_changes(changed.values())
         return record
 
     # ------------------------------------------------------------------
@@ -277,8 +356,7 @@ class NoteStorage:
         return raw_id.strip().strip("/")
 
     def _safe_stem(self, note_id: str) -> str:
-        normalized = self._normalize_id(note_id)
-        return normalized.replace("/", "__")
+        return _safe_stem(note_id)
 
     def _derive_parent_id(self, note_id: str) -> Optional[str]:
         normalized = self._normalize_id(note_id)
@@ -293,39 +371,135 @@ class NoteStorage:
     def _candidate_paths(
         self, note_id: str, kind: Optional[NoteKind] = None
     ) -> List[Tuple[Path, NoteKind]]:
-        stem = self._safe_stem(note_id)
         paths: List[Tuple[Path, NoteKind]] = []
         if kind in (None, NoteKind.NOTE):
-            paths.append((self.notes_dir / f"{stem}.json", NoteKind.NOTE))
+            paths.append((_record_path(self.notes_dir, note_id, NoteKind.NOTE), NoteKind.NOTE))
         if kind in (None, NoteKind.FOLDER):
-            paths.append((self.notes_dir / f"{stem}.folder.json", NoteKind.FOLDER))
+            paths.append((_record_path(self.notes_dir, note_id, NoteKind.FOLDER), NoteKind.FOLDER))
         return paths
 
     def _load_all_records(self) -> Dict[str, NoteRecord]:
-        records: Dict[str, NoteRecord] = {}
-        for path in self.notes_dir.glob("*.json"):
-            if path.name.endswith(".folder.json"):
-                continue
+        """Return copies of all records that callers may mutate and persist."""
+        return {rid: self._copy(record) for rid, record in self._cached_records().items()}
+
+    def _cached_records(self) -> Dict[str, NoteRecord]:
+        records = self._records
+        if records is None:
+            records = self._records = self._scan_records()
+        return records
+
+    @staticmethod
+    def _copy(record: NoteRecord) -> NoteRecord:
+        return replace(record, children=list(record.children))
+
+    def _scan_records(self) -> Dict[str, NoteRecord]:
+        """Load every record, reusing the snapshot for files that have not changed.
+
+        The per-note JSON files stay authoritative. The snapshot only saves
+        opening and parsing each of them on a cold start, and is refreshed here
+        whenever any file's mtime or size no longer matches it.
+        """
+        snapshot = self._read_snapshot()
+        fresh: Dict[str, Tuple[int, int, dict]] = {}
+
+        # DirEntry carries the file type from the directory listing, so
+        # filtering out stray subdirectories costs no extra stat calls.
+        with os.scandir(self.notes_dir) as entries:
+            files = [
+                (entry, entry.name.endswith(_FOLDER_SUFFIX))
+                for entry in entries
+                if entry.name.endswith(_NOTE_SUFFIX) and entry.is_file()
+            ]
+        # Notes first, then folders, so a folder wins if both share an id.
+        files.sort(key=lambda item: item[1])
+
+        stats = {}
+        to_read = []
+        for entry, _ in files:
             try:
-                record = self._read_record(path, path.stem.replace("__", "/"), NoteKind.NOTE)
-                records[record.id] = record
-            except Exception:
+                stat = entry.stat()
+            except OSError:
                 continue
+            stats[entry.name] = stat
+            cached = snapshot.get(entry.name)
+            if not (cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size):
+                to_read.append(entry)
+        stale_names = {entry.name for entry in to_read}
+        loaded = self._read_files(to_read)
+        stale = bool(to_read)
 
-        for path in self.notes_dir.glob("*.folder.json"):
+        records: Dict[str, NoteRecord] = {}
+        for entry, is_folder in files:
+            stat = stats.get(entry.name)
+            if stat is None:
+                continue
             try:
-                stem = path.name.replace(".folder.json", "").replace("__", "/")
-                record = self._read_record(path, stem, NoteKind.FOLDER)
+                raw = loaded[entry.name] if entry.name in stale_names else snapshot[entry.name][2]
+                fresh[entry.name] = (stat.st_mtime_ns, stat.st_size, raw)
+
+                if is_folder:
+                    stem = entry.name[: -len(_FOLDER_SUFFIX)].replace("__", "/")
+                    record = self._record_from_raw(raw, stem, NoteKind.FOLDER)
+                else:
+                    stem = entry.name[: -len(_NOTE_SUFFIX)].replace("__", "/")
+                    record = self._record_from_raw(raw, stem, NoteKind.NOTE)
                 records[record.id] = record
             except Exception:
                 continue
 
+        if stale or len(fresh) != len(snapshot):
+            self._write_snapshot(fresh)
         return records
 
-    def _read_record(self, path: Path, note_id: str, kind: NoteKind) -> NoteRecord:
-        with open(path, "r", encoding="utf-8") as handle:
-            raw = json.load(handle)
+    def _read_files(self, entries: List[os.DirEntry]) -> Dict[str, dict]:
+        """Parse the given record files, overlapping the reads on a small pool.
 
+        Files that fail to read or parse are left out of the result.
+        """
+
+        def read(entry: os.DirEntry):
+            try:
+                return entry.name, read_json(entry.path)
+            except Exception:
+                return entry.name, None
+
+        if len(entries) < _PARALLEL_READ_MIN:
+            results = [read(entry) for entry in entries]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=_scan_workers(), thread_name_prefix="grimoire-scan"
+            ) as pool:
+                results = list(pool.map(read, entries))
+        return {name: raw for name, raw in results if raw is not None}
+
+    def _read_snapshot(self) -> Dict[str, Tuple[int, int, dict]]:
+        path = self.notes_dir / _SNAPSHOT_NAME
+        snapshot: Dict[str, Tuple[int, int, dict]] = {}
+        try:
+            with open(path, "rb", buffering=BUFFER_SIZE) as handle:
+                for line in handle:
+                    entry = loads(line)
+                    snapshot[entry["file"]] = (entry["mtime_ns"], entry["size"], entry["raw"])
+        except FileNotFoundError:
+            pass
+        except Exception:
+            return {}
+        return snapshot
+
+    def _write_snapshot(self, files: Dict[str, Tuple[int, int, dict]]) -> None:
+        path = self.notes_dir / _SNAPSHOT_NAME
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb", buffering=BUFFER_SIZE) as handle:
+                for name, (mtime_ns, size, raw) in files.items():
+                    handle.write(
+                        dumps_line({"file": name, "mtime_ns": mtime_ns, "size": size, "raw": raw})
+                    )
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _record_from_raw(self, raw: dict, note_id: str, kind: NoteKind) -> NoteRecord:
         record_id = self._normalize_id(raw.get("id") or raw.get("path") or note_id)
         title = raw.get("title") or self._title_from_id(record_id)
         parent_id = raw.get("parent_id") or self._derive_parent_id(record_id)
@@ -351,12 +525,29 @@ class NoteStorage:
             updated_at=updated_at,
         )
 
-    def _persist_all(self, records: Dict[str, NoteRecord]):
-        self.notes_dir.mkdir(parents=True, exist_ok=True)
-        for record in records.values():
-            self._write_record(record)
+    def _apply_changes(self, updated: Iterable[NoteRecord], removed: Iterable[str] = ()):
+        """Write `updated` records and drop `removed` ids from the cache.
+
+        Structural edits touch a handful of records; this avoids copying and
+        rewriting the whole collection.
+        """
+        records = dict(self._cached_records())
+        for record_id in removed:
+            records.pop(record_id, None)
+        for record in updated:
+            self._write_file(record)
+            records[record.id] = self._copy(record)
+        self._records = records
+        self.revision += 1
 
     def _write_record(self, record: NoteRecord):
+        self._write_file(record)
+        records = dict(self._cached_records())
+        records[record.id] = self._copy(record)
+        self._records = records
+        self.revision += 1
+
+    def _write_file(self, record: NoteRecord):
         payload = {
             "id": record.id,
             "title": record.title,
@@ -377,15 +568,75 @@ class NoteStorage:
             payload["content"] = record.content
             path = self._candidate_paths(record.id, NoteKind.NOTE)[0][0]
 
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as handle:
-            json.dump(payload, handle, indent=2)
+        # Swap a complete file into place so a crash never leaves a torn note;
+        # the ".tmp" suffix keeps it out of the record scan.
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            write_json(tmp_path, payload)
+        except FileNotFoundError:
+            # notes_dir is created once in __init__; recreate it only if it
+            # was removed underneath us rather than stat-ing it on every save.
+            self.notes_dir.mkdir(parents=True, exist_ok=True)
+            write_json(tmp_path, payload)
+        os.replace(tmp_path, path)
+        self._schedule_sync(path)
+
+    def _schedule_sync(self, path: Path) -> None:
+        with self._sync_lock:
+            self._unsynced.add(path)
+            if self.sync_delay and self._sync_timer is None:
+                timer = threading.Timer(self.sync_delay, self.sync)
+                timer.daemon = True
+                self._sync_timer = timer
+                timer.start()
+        if not self.sync_delay:
+            self.sync()
+
+    def sync(self) -> None:
+        """fsync notes written since the last sync, then the directory once.
+
+        Autosave writes arrive in bursts; batching keeps fsync off the request
+        path while still making renamed files durable shortly after.
+        """
+        with self._sync_lock:
+            paths, self._unsynced = self._unsynced, set()
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        if paths:
+            try:
+                fd = os.open(self.notes_dir, os.O_RDONLY)
+            except OSError:
+                return  # Directories cannot be opened for fsync on Windows.
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
 
     def _ensure_parent_link(self, record: NoteRecord):
         parent_id = record.parent_id
         if not parent_id:
             return
 
+        # Saves to an already-linked note are the common case: answer from the
+        # cache without copying or rewriting the parent.
+        cached = self._cached_records().get(self._normalize_id(parent_id))
+        if cached is not None and record.id in cached.children:
+            return
+
         try:
             parent = self.get_note(parent_id)
         except FileNotFoundError:
@@ -400,8 +651,28 @@ class NoteStorage:
             parent.updated_at = time.time()
             self._write_record(parent)
 
-    def _collect_descendants(self, root_id: str, records: Dict[str, NoteRecord]) -> List[str]:
-        adjacency = self._build_adjacency(records)
+    def _record_links(self) -> Tuple[Dict[str, List[str]], Dict[str, Set[str]]]:
+        records = self._cached_records()
+        cached = self._links
+        if cached is None or cached[0] is not records:
+            adjacency = self._build_adjacency(records)
+            parents: Dict[str, Set[str]] = {}
+            for parent_id, child_ids in adjacency.items():
+                for child_id in child_ids:
+                    parents.setdefault(child_id, set()).add(parent_id)
+            cached = self._links = (records, adjacency, parents)
+        return cached[1], cached[2]
+
+    def _referrers(self, ids: Set[str]) -> Set[str]:
+        """Ids outside `ids` that link to any of them as parent or via children."""
+        parents = self._record_links()[1]
+        found: Set[str] = set()
+        for record_id in ids:
+            found.update(parents.get(record_id, ()))
+        return found - ids
+
+    def _collect_descendants(self, root_id: str) -> List[str]:
+        adjacency = self._record_links()[0]
         to_visit = [root_id]
         seen: Set[str] = set()
 
@@ -424,7 +695,9 @@ class NoteStorage:
         return adjacency
 
     def _to_node(self, record: NoteRecord) -> NoteNodePayload:
-        return NoteNodePayload(
+        # Records are typed when loaded, so skip pydantic validation here; it
+        # dominated building the tree for large note collections.
+        return NoteNodePayload.model_construct(
             id=record.id,
             title=record.title,
             kind=record.kind,
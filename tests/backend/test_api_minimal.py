@@ -115,17 +115,30 @@ class TestFastAPIMinimal:
         """Test the all-notes endpoint returns proper structure."""
         import main
 
+        from pathlib import Path
+
         class DummyNotes:
             def tree(self):
                 return {"notes": []}
 
         class DummyState:
             def __init__(self):
-                self._services = type("Services", (), {"notes": DummyNotes()})()
+                self._services = type(
+                    "Services",
+                    (),
+                    {
+                        "notes": DummyNotes(),
+                        "storage": type("Storage", (), {"revision": 0, "instance_id": "0a1b2c3d"})(),
+                        "project": type("Project", (), {"root": Path("/tmp/grimoire")})(),
+                    },
+                )()
 
             def current(self):
                 return self._services
 
+            def cached_response(self, key, build):
+                return build()
+
         original_state = main.state
         main.state = DummyState()
 
@@ -142,6 +155,183 @@ class TestFastAPIMinimal:
             # Restore original component
             main.state = original_state
 
+    def test_update_note_raw_coalesces_pending_reindex(self):
+        """Test that a save queues no second reindex while one is still pending."""
+        import main
+
+        class DummyNotes:
+            def __init__(self):
+                self.reindexed = []
+
+            def write_note(self, request):
+                record = type("Record", (), {"id": request.note_id})()
+                return record, True
+
+            def reindex_note(self, note_id):
+                self.reindexed.append(note_id)
+
+        notes = DummyNotes()
+
+        class DummyState:
+            def current(self):
+                return type("Services", (), {"notes": notes})()
+
+        original_state = main.state
+        main.state = DummyState()
+
+        try:
+            main._pending_reindex.add((id(notes), "draft"))
+            response = self.client.post("/update-note-raw?note_id=draft", content=b"v2")
+            assert response.status_code == 200
+            assert notes.reindexed == []
+
+            main._pending_reindex.clear()
+            response = self.client.post("/update-note-raw?note_id=draft", content=b"v3")
+            assert response.status_code == 200
+            assert notes.reindexed == ["draft"]
+            assert not main._pending_reindex
+        finally:
+            main._pending_reindex.clear()
+            main.state = original_state
+
+    def test_attachment_upload_streams_and_enforces_limit(self):
+        """Test that uploads round-trip and oversize ones leave no file."""
+        import tempfile
+        from pathlib import Path
+
+        import main
+
+        attachments_dir = Path(tempfile.mkdtemp()) / "attachments"
+        project = type("Project", (), {"attachments_dir": attachments_dir})()
+
+        class DummyState:
+            def current(self):
+                return type("Services", (), {"project": project})()
+
+        original_state = main.state
+        original_chunk = main._ATTACHMENT_CHUNK_BYTES
+        original_limit = main._MAX_ATTACHMENT_BYTES
+        main.state = DummyState()
+        main._ATTACHMENT_CHUNK_BYTES = 4
+        main._MAX_ATTACHMENT_BYTES = 10
+
+        try:
+            files = {"file": ("pic.png", b"0123456789", "image/png")}
+            response = self.client.post("/attachments", files=files)
+            assert response.status_code == 200
+            stored = attachments_dir / response.json()["filename"]
+            assert stored.read_bytes() == b"0123456789"
+
+            response = self.client.get(f"/attachments/{stored.name}")
+            assert response.status_code == 200
+            assert response.content == b"0123456789"
+            assert "immutable" in response.headers["cache-control"]
+            etag = response.headers["etag"]
+            response = self.client.get(
+                f"/attachments/{stored.name}", headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            assert response.content == b""
+            response = self.client.head(f"/attachments/{stored.name}")
+            assert response.status_code == 200
+            assert response.headers["content-length"] == "10"
+            assert self.client.get("/attachments/missing.png").status_code == 404
+            assert self.client.get("/attachments/%2e%2e").status_code == 400
+
+            files = {"file": ("big.png", b"0123456789A", "image/png")}
+            response = self.client.post("/attachments", files=files)
+            assert response.status_code == 413
+            assert [p.name for p in attachments_dir.iterdir()] == [stored.name]
+
+            # Far past the limit: refused from Content-Length, body unread.
+            files = {"file": ("huge.png", b"0" * (main._MULTIPART_OVERHEAD_BYTES + 11), "image/png")}
+            response = self.client.post("/attachments", files=files)
+            assert response.status_code == 413
+            assert response.json()["detail"] == "Attachment too large"
+            assert [p.name for p in attachments_dir.iterdir()] == [stored.name]
+        finally:
+            main.state = original_state
+            main._ATTACHMENT_CHUNK_BYTES = original_chunk
+            main._MAX_ATTACHMENT_BYTES = original_limit
+
+    def test_notes_revalidate_against_storage_revision(self):
+        """Test that an unchanged tree is neither rebuilt nor resent."""
+        from pathlib import Path
+
+        import main
+
+        calls = []
+
+        class DummyNotes:
+            def tree(self):
+                calls.append("tree")
+                return {"notes": []}
+
+        storage = type("Storage", (), {"revision": 3, "instance_id": "0a1b2c3d"})()
+        services = type(
+            "Services",
+            (),
+            {
+                "notes": DummyNotes(),
+                "storage": storage,
+                "project": type("Project", (), {"root": Path("/tmp/grimoire")})(),
+            },
+        )()
+
+        class DummyState:
+            def __init__(self):
+                self.bodies = {}
+
+            def current(self):
+                return services
+
+            def cached_response(self, key, build):
+                if key not in self.bodies:
+                    self.bodies[key] = build()
+                return self.bodies[key]
+
+        original_state = main.state
+        main.state = DummyState()
+
+        try:
+            response = self.client.get("/notes")
+            etag = response.headers["etag"]
+            assert response.status_code == 200
+            assert etag.startswith('W/"') and etag.endswith('-3"')
+            assert response.headers["cache-control"] == "private, must-revalidate"
+
+            response = self.client.get("/notes", headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert self.client.get("/all-notes").json() == {"notes": []}
+            assert calls == ["tree"]
+
+            storage.revision = 4
+            response = self.client.get("/notes", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+            assert calls == ["tree", "tree"]
+        finally:
+            main.state = original_state
+
+    def test_notes_etag_changes_when_storage_is_reopened(self):
+        """Test that a validator from an earlier storage instance never matches."""
+        import tempfile
+        from pathlib import Path
+
+        import main
+        from storage import NoteStorage
+
+        root = Path(tempfile.mkdtemp())
+        project = type("Project", (), {"root": root})()
+
+        def etag(storage):
+            return main._notes_etag(type("Services", (), {"storage": storage, "project": project})())
+
+        first = NoteStorage(root=root / "notes")
+        reopened = NoteStorage(root=root / "notes")
+        assert first.revision == reopened.revision == 0
+        assert etag(first) != etag(reopened)
+
     def test_get_note_endpoint_error_handling(self):
         """Test the get-note endpoint returns proper error for non-existent note."""
         response = self.client.get("/note/nonexistent_note_12345")
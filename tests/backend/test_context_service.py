@@ -0,0 +1,195 @@
+"""
+Unit tests for the context service and its index.
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from context_service import ContextIndex, ContextService, _dot, _normalize_dense
+from jsonio import write_json
+from models import NoteKind, NoteRecord
+
+NOTES = {
+    "alpha": (
+        "# Solar Power\n\nSolar Power panels convert Sunlight into electricity.\n\n"
+        "Battery Storage keeps Solar Power available at night."
+    ),
+    "beta": (
+        "# Battery Storage\n\nLithium Cells dominate Battery Storage today.\n\n"
+        "Grid Operators balance Solar Power with demand."
+    ),
+    "gamma": (
+        "# Wind Turbines\n\nWind Turbines feed the Grid Operators network.\n\n"
+        "Offshore Wind Turbines need Battery Storage too."
+    ),
+}
+
+
+class FakeEmbedder:
+    """Deterministic unit vectors per text; records every batch it encodes."""
+
+    model_name = "fake"
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def embedding_dim(self):
+        return self.dim
+
+    def vector(self, text):
+        seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+        vec = np.random.default_rng(seed).normal(size=self.dim).astype(np.float32)
+        return vec / np.linalg.norm(vec)
+
+    def encode_dense_batch(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([self.vector(text) for text in texts])
+
+    def encode_dense(self, text):
+        return self.encode_dense_batch([text])[0]
+
+
+class TestContextService:
+    """Test suite for context indexing and candidate scoring."""
+
+    def setup_method(self):
+        """Set up a context service over a temporary index."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.embedder = FakeEmbedder()
+        self.service = ContextService(embedder=self.embedder, index=self._open_index())
+
+    def teardown_method(self):
+        """Clean up the temporary index."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _open_index(self):
+        return ContextIndex(
+            metadata_path=os.path.join(self.temp_dir, "context_index.json"),
+            faiss_path=os.path.join(self.temp_dir, "context_faiss.index"),
+        )
+
+    def _index_notes(self):
+        for note_id, content in NOTES.items():
+            self.service.index_note(NoteRecord(id=note_id, title=note_id, kind=NoteKind.NOTE, content=content))
+
+    def test_index_note_encodes_blocks_in_one_batch(self):
+        """Test that indexing a note sends all of its blocks through one encode call."""
+        record = NoteRecord(id="alpha", title="alpha", kind=NoteKind.NOTE, content=NOTES["alpha"])
+
+        count = self.service.index_note(record)
+
+        assert count == 3
+        assert len(self.embedder.calls) == 1
+        assert len(self.embedder.calls[0]) == 3
+
+    def test_resave_encodes_only_changed_blocks(self):
+        """Test that unchanged blocks keep their stored vectors on re-save."""
+        self._index_notes()
+        edited = NOTES["alpha"].replace("at night", "after sunset")
+        self.embedder.calls.clear()
+
+        self.service.index_note(NoteRecord(id="alpha", title="alpha", kind=NoteKind.NOTE, content=edited))
+
+        assert self.embedder.calls == [["Battery Storage keeps Solar Power available after sunset."]]
+
+    def test_vectors_are_held_as_float32_arrays(self):
+        """Test that chunk vectors are float32 arrays after indexing and after loading."""
+        self._index_notes()
+        chunk = self.service.index.get_chunk(self.service.index.chunk_ids()[0])
+        assert isinstance(chunk["dense"], np.ndarray)
+        assert chunk["dense"].dtype == np.float32
+
+        # Older metadata keeps vectors inline as float lists.
+        payload = {"chunks": {"legacy:0:5:0": {"note_id": "legacy", "text": "Hello", "dense": [0.5, 0.5]}}}
+        write_json(os.path.join(self.temp_dir, "context_index.json"), payload)
+        os.remove(self.service.index.vectors_path)
+        dense = self._open_index().get_chunk("legacy:0:5:0")["dense"]
+        assert isinstance(dense, np.ndarray)
+        assert dense.dtype == np.float32
+        assert dense.tolist() == [0.5, 0.5]
+
+    def test_vectors_sidecar_round_trips(self):
+        """Test that vectors saved to the sidecar reload unchanged and stay out of the JSON."""
+        self._index_notes()
+        saved = {cid: self.service.index.get_chunk(cid)["dense"] for cid in self.service.index.chunk_ids()}
+
+        with open(os.path.join(self.temp_dir, "context_index.json"), "rb") as handle:
+            assert b'"dense"' not in handle.read()
+        reopened = self._open_index()
+
+        assert sorted(reopened.chunk_ids()) == sorted(saved)
+        for cid, dense in saved.items():
+            np.testing.assert_array_equal(reopened.get_chunk(cid)["dense"], dense)
+
+    @pytest.mark.parametrize("damage", ["missing", "corrupt"])
+    def test_unreadable_sidecar_falls_back_to_reembedding(self, damage):
+        """Test that notes are re-embedded when the vectors sidecar cannot be read."""
+        self._index_notes()
+        vectors_path = self.service.index.vectors_path
+        if damage == "missing":
+            os.remove(vectors_path)
+        else:
+            with open(vectors_path, "wb") as handle:
+                handle.write(b"not an npz file")
+        embedder = FakeEmbedder()
+        service = ContextService(embedder=embedder, index=self._open_index())
+
+        service.index_note(NoteRecord(id="alpha", title="alpha", kind=NoteKind.NOTE, content=NOTES["alpha"]))
+
+        assert len(embedder.calls) == 1
+        assert len(embedder.calls[0]) == 3
+        chunk = service.index.chunks_for_note("alpha")[0]
+        np.testing.assert_allclose(chunk["dense"], embedder.vector(chunk["text"]))
+
+    def test_candidate_similarities_match_per_candidate_scoring(self):
+        """Test that batched scoring matches scoring each candidate and gap in turn."""
+        self._index_notes()
+        index = self.service.index
+        candidate_ids = index.chunk_ids()
+        query_vec = self.embedder.vector("query")
+        prefix_vec = self.embedder.vector("prefix")
+        gap_list = sorted(index._concept_chunks)
+        assert gap_list
+
+        batched = self.service._candidate_similarities(candidate_ids, query_vec, gap_list, prefix_vec)
+
+        assert sorted(batched) == sorted(candidate_ids)
+        for cid in candidate_ids:
+            vec = _normalize_dense(index.get_chunk(cid)["dense"])
+            gap_support, gap_best = 0.0, None
+            for gap_id in gap_list:
+                centroid = index.concept_centroid(gap_id)
+                if centroid is None:
+                    continue
+                val = _dot(vec, centroid)
+                if val > gap_support:
+                    gap_support, gap_best = val, gap_id
+            rel, support, best, redundancy = batched[cid]
+            assert rel == pytest.approx(_dot(vec, query_vec), abs=1e-5)
+            assert support == pytest.approx(gap_support, abs=1e-5)
+            assert best == gap_best
+            assert redundancy == pytest.approx(_dot(vec, prefix_vec), abs=1e-5)
+
+    def test_candidate_similarities_skip_mismatched_dimension(self):
+        """Test that stored vectors of another dimension score nothing instead of raising."""
+        self._index_notes()
+        query_vec = FakeEmbedder(dim=4).vector("query")
+
+        similarities = self.service._candidate_similarities(
+            self.service.index.chunk_ids(), query_vec, [], None
+        )
+
+        assert similarities == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+"""
+Unit tests for background glossary updates.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from glossary_service import GlossaryService
+from models import NoteKind, NoteRecord
+
+
+class TestGlossaryUpdates:
+    """Test suite for the debounced glossary update thread."""
+
+    def setup_method(self):
+        """Set up a glossary service whose extraction and persistence are stubbed."""
+        self.temp_dir = tempfile.mkdtemp()
+        storage = Mock()
+        storage.get_note.side_effect = lambda note_id: NoteRecord(
+            id=note_id, title=note_id, kind=NoteKind.NOTE, content=f"{note_id} {time.monotonic()}"
+        )
+        self.service = GlossaryService(
+            path=Path(self.temp_dir) / "glossary.json",
+            index=Mock(),
+            storage=storage,
+            update_delay=0.2,
+        )
+        self.extracted = []
+        self.recomputed = threading.Event()
+        self.service._extract_note = self._extract_note
+        self.service._recompute_entities_and_entries = Mock(side_effect=self.recomputed.set)
+        self.service._save = Mock()
+
+    def teardown_method(self):
+        """Clean up the temporary glossary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _extract_note(self, note_id, cleaned, note_hash):
+        self.extracted.append(note_id)
+        return Mock(text_hash=note_hash)
+
+    def _join_worker(self):
+        thread = self.service._update_thread
+        if thread is not None:
+            thread.join(timeout=5)
+        assert self.service._update_thread is None
+
+    def test_saves_within_delay_recompute_once(self):
+        """Test that a burst of saves inside the delay is processed in one pass."""
+        for note_id in ("a", "b", "a", "b", "a"):
+            self.service.update_for_note(note_id)
+
+        self._join_worker()
+
+        assert sorted(self.extracted) == ["a", "b"]
+        assert self.service._recompute_entities_and_entries.call_count == 1
+        assert self.service._save.call_count == 1
+
+    def test_update_queued_while_worker_exits_is_processed(self):
+        """Test that an id queued as the worker finishes is still picked up."""
+        self.service.update_for_note("a")
+        assert self.recomputed.wait(timeout=5)
+        worker = self.service._update_thread
+
+        # The worker is sleeping before its next (empty) check; hold the lock
+        # so that check waits while another save is queued.
+        with self.service._lock:
+            self.service.update_for_note("b")
+            time.sleep(0.3)
+            assert self.service._update_thread is worker
+
+        self._join_worker()
+        assert self.extracted == ["a", "b"]
+
+        # Once retired, the next save starts a fresh worker.
+        self.service.update_for_note("c")
+        self._join_worker()
+        assert self.extracted == ["a", "b", "c"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -44,6 +44,18 @@ class TestIndexer:
         assert self.indexer.metadata == {}
         assert self.indexer.note_tree == {}
 
+    def test_search_threads_default_splits_cpus_across_embed_pool(self):
+        """Test that pooled searches together use at most one thread per CPU by default."""
+        note_tree_path = os.path.join(self.temp_dir, "note_tree.json")
+        with patch.dict(os.environ, {"GRIMOIRE_FAISS_SEARCH_THREADS": ""}), \
+                patch("indexer.os.cpu_count", return_value=8):
+            with patch("indexer.EMBED_WORKERS", 4):
+                indexer = Indexer(self.index_path, self.metadata_path, note_tree_path)
+                assert indexer.search_threads == 2
+            with patch("indexer.EMBED_WORKERS", 16):
+                indexer = Indexer(self.index_path, self.metadata_path, note_tree_path)
+                assert indexer.search_threads == 1
+
     def test_load_metadata_existing_file(self):
         """Test loading metadata from existing file."""
         # Create test metadata
@@ -131,8 +143,8 @@ class TestIndexer:
 
     def test_update_note(self):
         """Test updating a note in the index."""
-        # Mock _add_to_index and _update_note_tree
-        self.indexer._add_to_index = Mock()
+        # Mock _add_batch_to_index and _update_note_tree
+        self.indexer._add_batch_to_index = Mock()
         self.indexer._update_note_tree = Mock()
         self.indexer._save_metadata = Mock()
         self.indexer._save_index = Mock()
@@ -161,7 +173,9 @@ class TestIndexer:
         assert "chunk_2" in self.indexer.metadata
 
         # Verify methods were called
-        assert self.indexer._add_to_index.call_count == 2
+        self.indexer._add_batch_to_index.assert_called_once_with(
+            ["chunk_1", "chunk_2"], [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+        )
         self.indexer._update_note_tree.assert_called_once_with(note_id)
         self.indexer._save_metadata.assert_called_once()
         self.indexer._save_index.assert_called_once()
@@ -349,6 +363,20 @@ class TestIndexer:
                 "embedding": [0.7, 0.8, 0.9],
                 "index_position": 2,
             },
+            "chunk_3": {
+                "note_id": "note_3",
+                "chunk_id": "chunk_3",
+                "text": "Text 3",
+                "embedding": [0.2, 0.1, 0.3],
+                "index_position": 3,
+            },
+            "chunk_4": {
+                "note_id": "note_3",
+                "chunk_id": "chunk_4",
+                "text": "Text 4",
+                "embedding": [0.3, 0.1, 0.2],
+                "index_position": 4,
+            },
         }
 
         # Mock numpy array for query
@@ -548,6 +576,160 @@ class TestIndexer:
         assert not os.path.exists(self.index_path)
         assert not os.path.exists(self.metadata_path)
 
+    def test_saves_are_deferred_until_flush(self):
+        """Test that metadata writes are coalesced and persisted on flush."""
+        indexer = Indexer(
+            index_path=self.index_path,
+            metadata_path=self.metadata_path,
+            note_tree_path=os.path.join(self.temp_dir, "note_tree.json"),
+            flush_delay=60,
+        )
+        indexer.metadata = {"chunk_1": {"note_id": "note_1", "chunk_id": "chunk_1"}}
+
+        indexer._save_metadata()
+        indexer._save_metadata()
+        assert not os.path.exists(self.metadata_path)
+
+        assert indexer.flush()
+        with open(self.metadata_path, "r") as f:
+            assert json.load(f) == indexer.metadata
+        assert not [name for name in os.listdir(self.temp_dir) if name.endswith(".tmp")]
+        assert indexer._flush_timer is None
+
+    def test_zero_flush_delay_writes_immediately(self):
+        """Test that a zero flush delay persists on every save."""
+        indexer = Indexer(
+            index_path=self.index_path,
+            metadata_path=self.metadata_path,
+            note_tree_path=os.path.join(self.temp_dir, "note_tree.json"),
+            flush_delay=0,
+        )
+        indexer.metadata = {"chunk_1": {"note_id": "note_1", "chunk_id": "chunk_1"}}
+
+        indexer._save_metadata()
+
+        assert os.path.exists(self.metadata_path)
+
+    def test_search_skips_dead_rows_from_repeated_reindex(self):
+        """Test that dead rows left by re-saving a note do not crowd out hits."""
+        indexer = Indexer(
+            index_path=self.index_path,
+            metadata_path=self.metadata_path,
+            note_tree_path=os.path.join(self.temp_dir, "note_tree.json"),
+        )
+        rng = np.random.default_rng(0)
+
+        def unit(vector):
+            return (vector / np.linalg.norm(vector)).tolist()
+
+        for i in range(60):
+            chunk = {"chunk_id": f"note_{i}_0", "text": "text", "embedding": unit(rng.normal(size=16))}
+            indexer.update_note(f"note_{i}", [chunk])
+        hot = rng.normal(size=16)
+        for _ in range(19):
+            embedding = unit(hot + rng.normal(size=16) * 0.01)
+            indexer.update_note("hot", [{"chunk_id": "hot_0", "text": "text", "embedding": embedding}])
+
+        assert indexer.index.ntotal > len(indexer.metadata)
+        search = indexer.index.search
+        requested = []
+
+        def spy(queries, k, **kwargs):
+            requested.append(k)
+            return search(queries, k, **kwargs)
+
+        # Dead rows are excluded inside FAISS, not by over-fetching past them.
+        indexer.index.search = spy
+        assert len(indexer.search(unit(hot), top_k=10)) == 10
+        assert requested == [20]
+
+    def test_layout_downsizes_only_past_margin(self):
+        """Test that a corpus just under a layout threshold keeps its index."""
+        indexer = Indexer(
+            index_path=self.index_path,
+            metadata_path=self.metadata_path,
+            note_tree_path=os.path.join(self.temp_dir, "note_tree.json"),
+            quantize=True,
+            flush_delay=60,
+        )
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(1100, 16)).astype(np.float32)
+        for n in range(11):
+            chunks = [
+                {"chunk_id": f"note_{n}_{i}", "text": f"{n}.{i}", "embedding": vectors[n * 100 + i].tolist()}
+                for i in range(100)
+            ]
+            indexer.update_note(f"note_{n}", chunks)
+        assert indexer._layout_of(indexer.index) == "sq8"
+
+        # 900 live vectors: below the threshold, but within the margin.
+        indexer.delete_note("note_10")
+        indexer.delete_note("note_9")
+        assert indexer._layout_of(indexer.index) == "sq8"
+        assert indexer.index.ntotal == 1100
+
+        indexer.delete_note("note_8")
+        assert indexer._layout_of(indexer.index) == "flat"
+        assert indexer.index.ntotal == 800
+
+    def test_search_is_consistent_with_concurrent_updates(self):
+        """Test that searches racing note updates get full, correctly mapped hits."""
+        import threading
+
+        indexer = Indexer(
+            index_path=self.index_path,
+            metadata_path=self.metadata_path,
+            note_tree_path=os.path.join(self.temp_dir, "note_tree.json"),
+            quantize=False,
+            flush_delay=60,
+        )
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(40, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        def chunks(i):
+            return [{"chunk_id": f"note_{i}_0", "text": f"note_{i}", "embedding": vectors[i].tolist()}]
+
+        # A hit mapped to the wrong row carries another chunk's score.
+        expected = {f"note_{i}_0": float(vectors[0] @ vectors[i]) for i in range(40)}
+
+        for i in range(40):
+            indexer.update_note(f"note_{i}", chunks(i))
+
+        done = threading.Event()
+        failures = []
+
+        def write():
+            # Repeated re-saves leave dead rows and trigger compaction rebuilds.
+            for round_ in range(200):
+                for i in range(round_ % 4, 40, 4):
+                    indexer.update_note(f"note_{i}", chunks(i))
+            done.set()
+
+        def read():
+            while not done.is_set():
+                hits = indexer.search(vectors[0].tolist(), top_k=5)
+                if len(hits) != 5:
+                    failures.append(len(hits))
+                failures.extend(
+                    hit for hit in hits if abs(hit["score"] - expected[hit["chunk_id"]]) > 1e-4
+                )
+
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(2)]
+        # Switch threads often so searches land inside writer critical sections.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        indexer.flush()
+
+        assert failures == []
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
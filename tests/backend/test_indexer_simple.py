@@ -83,8 +83,8 @@ class TestIndexerSimple:
 
     def test_update_note(self):
         """Test updating a note in the index."""
-        # Mock _add_to_index and _update_note_tree
-        self.indexer._add_to_index = Mock()
+        # Mock _add_batch_to_index and _update_note_tree
+        self.indexer._add_batch_to_index = Mock()
         self.indexer._update_note_tree = Mock()
         self.indexer._save_metadata = Mock()
         self.indexer._save_index = Mock()
@@ -113,7 +113,9 @@ class TestIndexerSimple:
         assert "chunk_2" in self.indexer.metadata
 
         # Verify methods were called
-        assert self.indexer._add_to_index.call_count == 2
+        self.indexer._add_batch_to_index.assert_called_once_with(
+            ["chunk_1", "chunk_2"], [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+        )
         self.indexer._update_note_tree.assert_called_once_with(note_id)
         self.indexer._save_metadata.assert_called_once()
         self.indexer._save_index.assert_called_once()
@@ -332,12 +334,101 @@ class TestIndexerSimple:
         results = self.indexer.search([0.1, 0.2, 0.3])
         assert results == []
 
+    def test_search_batch_returns_one_result_list_per_query(self):
+        """Test that batched search demultiplexes hits back to each query."""
+        pytest.importorskip("faiss")
+        self.indexer.update_note(
+            "note_a",
+            [
+                {"chunk_id": "a_0", "text": "Alpha", "embedding": [1.0, 0.0, 0.0]},
+                {"chunk_id": "a_1", "text": "Beta", "embedding": [0.0, 1.0, 0.0]},
+            ],
+        )
+
+        results = self.indexer.search_batch(
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], top_k=1
+        )
+
+        assert [hits[0]["chunk_id"] for hits in results] == ["a_0", "a_1"]
+        assert results[0] == self.indexer.search([1.0, 0.0, 0.0], top_k=1)
+        assert self.indexer.search_batch([[1.0, 0.0, 0.0]], exclude_note_id="note_a") == [[]]
+
+    def test_removed_chunks_are_skipped_until_compaction(self):
+        """Test that re-indexing leaves dead rows that search ignores, then compacts."""
+        pytest.importorskip("faiss")
+
+        def chunk(chunk_id, axis):
+            embedding = [0.0] * 8
+            embedding[axis] = 1.0
+            return {"chunk_id": chunk_id, "text": chunk_id, "embedding": embedding}
+
+        self.indexer.update_note("note_a", [chunk("a_0", 0), chunk("a_1", 1)])
+        self.indexer.update_note("note_b", [chunk(f"b_{i}", i + 2) for i in range(6)])
+
+        self.indexer.update_note("note_a", [chunk("a_2", 0), chunk("a_3", 1)])
+
+        assert self.indexer.index.ntotal == 10
+        hits = self.indexer.search(chunk("q", 0)["embedding"], top_k=3)
+        assert "a_0" not in {hit["chunk_id"] for hit in hits}
+        assert hits[0]["chunk_id"] == "a_2"
+
+        self.indexer.delete_note("note_b")
+
+        assert self.indexer.index.ntotal == 2
+        assert self.indexer.search(chunk("q", 1)["embedding"], top_k=1)[0]["chunk_id"] == "a_3"
+
+    def test_metadata_embeddings_are_stored_as_int8_codes(self):
+        """Test that stored embeddings are quantized and decode close to the input."""
+        pytest.importorskip("faiss")
+        embedding = [0.6, -0.3, 0.05, 0.74]
+        self.indexer.update_note(
+            "note_a", [{"chunk_id": "a_0", "text": "Alpha", "embedding": embedding}]
+        )
+        self.indexer.flush()
+
+        stored = self.indexer.get_chunk("a_0")
+        assert "embedding" not in stored
+        assert "embedding_q8" in stored
+
+        reloaded = Indexer(
+            index_path=self.index_path,
+            metadata_path=self.metadata_path,
+            note_tree_path=self.note_tree_path,
+        )
+        decoded = reloaded.get_note_embeddings("note_a")["Alpha"]
+        assert decoded == pytest.approx(embedding, abs=0.005)
+
     def test_save_index_none(self):
         """Test saving when index is None."""
         self.indexer.index = None
         self.indexer._save_index()
         # Should not raise any exception
 
+    def test_mapped_index_is_copied_before_update(self):
+        """Test that a memory-mapped index can still take updates."""
+        pytest.importorskip("faiss")
+        kwargs = dict(
+            index_path=self.index_path,
+            metadata_path=self.metadata_path,
+            note_tree_path=self.note_tree_path,
+            flush_delay=0,
+        )
+        writer = Indexer(**kwargs)
+        writer.update_note(
+            "note_a",
+            [{"chunk_id": "a_0", "text": "Alpha", "embedding": [1.0, 0.0, 0.0]}],
+        )
+
+        reader = Indexer(mmap=True, **kwargs)
+        reader.update_note(
+            "note_b",
+            [{"chunk_id": "b_0", "text": "Beta", "embedding": [0.0, 1.0, 0.0]}],
+        )
+
+        assert reader._index_mapped is False
+        assert reader.index.ntotal == 2
+        assert reader.search([0.0, 1.0, 0.0], top_k=1)[0]["chunk_id"] == "b_0"
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
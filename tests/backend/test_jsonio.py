@@ -0,0 +1,73 @@
+"""
+Unit tests for the jsonio file helpers.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from jsonio import read_json, replace_atomically, write_json
+
+
+class TestReplaceAtomically:
+    """Test suite for atomic file replacement."""
+
+    def setup_method(self):
+        """Set up a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "glossary.json")
+
+    def teardown_method(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_concurrent_writers_use_separate_temp_files(self):
+        """Test that overlapping writes each land whole and leave no temp files."""
+        both_written = threading.Barrier(2)
+        errors = []
+
+        def save(value):
+            def write(tmp_path):
+                write_json(tmp_path, {"value": value})
+                # Both temp files exist before either is swapped into place.
+                both_written.wait(timeout=5)
+
+            try:
+                replace_atomically(self.path, write)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=save, args=(value,)) for value in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert read_json(self.path) in ({"value": "a"}, {"value": "b"})
+        assert os.listdir(self.temp_dir) == ["glossary.json"]
+
+    def test_failed_write_keeps_old_file(self):
+        """Test that a failing writer leaves the previous file and no temp file."""
+        write_json(self.path, {"value": "old"})
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as handle:
+                handle.write(b"{partial")
+            raise RuntimeError("disk full")
+
+        with pytest.raises(RuntimeError):
+            replace_atomically(self.path, write)
+
+        assert read_json(self.path) == {"value": "old"}
+        assert os.listdir(self.temp_dir) == ["glossary.json"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
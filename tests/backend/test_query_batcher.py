@@ -0,0 +1,102 @@
+"""
+Unit tests for the QueryBatcher module.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from models import SearchRequest
+from query_batcher import QueryBatcher
+
+
+class RecordingSearch:
+    """Search service stub that records how requests were grouped."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def search(self, request):
+        with self.lock:
+            self.calls.append([request.text])
+        return [request.text]
+
+    def search_many(self, requests):
+        with self.lock:
+            self.calls.append([request.text for request in requests])
+        return [[request.text] for request in requests]
+
+
+class TestQueryBatcher:
+    """Test suite for QueryBatcher."""
+
+    def test_concurrent_requests_share_one_batch(self):
+        """Test that requests arriving together run as one search_many call."""
+        service = RecordingSearch()
+        batcher = QueryBatcher(max_batch=8, max_wait=0.05)
+
+        async def run():
+            results = await asyncio.gather(
+                *[
+                    batcher.submit(service, SearchRequest(text=text, note_id="n"))
+                    for text in ("a", "b", "c")
+                ]
+            )
+            await batcher.stop()
+            return results
+
+        results = asyncio.run(run())
+
+        assert results == [["a"], ["b"], ["c"]]
+        assert service.calls == [["a", "b", "c"]]
+
+    def test_batches_are_capped_and_split_by_service(self):
+        """Test that max_batch bounds a batch and services are never mixed."""
+        first, second = RecordingSearch(), RecordingSearch()
+        batcher = QueryBatcher(max_batch=2, max_wait=0.05)
+
+        async def run():
+            await asyncio.gather(
+                batcher.submit(first, SearchRequest(text="a", note_id="n")),
+                batcher.submit(second, SearchRequest(text="b", note_id="n")),
+                batcher.submit(first, SearchRequest(text="c", note_id="n")),
+            )
+            await batcher.stop()
+
+        asyncio.run(run())
+
+        assert first.calls == [["a"], ["c"]]
+        assert second.calls == [["b"]]
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        """Test that a failing batch raises for each waiting request."""
+
+        class FailingSearch(RecordingSearch):
+            def search_many(self, requests):
+                raise RuntimeError("index unavailable")
+
+        batcher = QueryBatcher(max_wait=0.05)
+        service = FailingSearch()
+
+        async def run():
+            results = await asyncio.gather(
+                batcher.submit(service, SearchRequest(text="a", note_id="n")),
+                batcher.submit(service, SearchRequest(text="b", note_id="n")),
+                return_exceptions=True,
+            )
+            await batcher.stop()
+            return results
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,351 @@
+"""
+Unit tests for the NoteService/SearchService coordination layer.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from models import NoteKind, NoteRecord, SearchRequest, UpdateNoteRequest
+from services import NoteService, SearchService
+from storage import NoteStorage
+
+
+class TestNoteService:
+    """Test suite for NoteService save paths."""
+
+    def setup_method(self):
+        """Set up a NoteService over a temporary storage root."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = NoteStorage(root=Path(self.temp_dir) / "notes")
+        self.search = Mock()
+        self.context = Mock()
+        self.glossary = Mock()
+        self.service = NoteService(
+            storage=self.storage,
+            search=self.search,
+            context=self.context,
+            glossary=self.glossary,
+        )
+
+    def teardown_method(self):
+        """Clean up temporary storage."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_save_note_indexes_new_content(self):
+        """Test that saving new content persists and indexes the note."""
+        record = self.service.save_note(UpdateNoteRequest(note_id="ideas", content="First draft"))
+
+        assert record.id == "ideas"
+        assert self.storage.get_note("ideas").content == "First draft"
+        self.search.index_note.assert_called_once()
+        self.context.index_note.assert_called_once()
+        self.glossary.update_for_note.assert_called_once_with("ideas")
+
+    def test_save_note_skips_unchanged_content(self):
+        """Test that re-saving identical content skips the write and index pipeline."""
+        self.service.save_note(UpdateNoteRequest(note_id="ideas", content="Same text"))
+        saved_at = self.storage.get_note("ideas").updated_at
+        self.search.reset_mock()
+        self.context.reset_mock()
+        self.glossary.reset_mock()
+
+        record = self.service.save_note(UpdateNoteRequest(note_id="ideas", content="Same text"))
+
+        assert record.id == "ideas"
+        assert self.storage.get_note("ideas").updated_at == saved_at
+        self.search.index_note.assert_not_called()
+        self.context.index_note.assert_not_called()
+        self.glossary.update_for_note.assert_not_called()
+
+    def test_save_note_reindexes_changed_content(self):
+        """Test that changed content still goes through the full pipeline."""
+        self.service.save_note(UpdateNoteRequest(note_id="ideas", content="Before"))
+        self.search.reset_mock()
+
+        self.service.save_note(UpdateNoteRequest(note_id="ideas", content="After"))
+
+        assert self.storage.get_note("ideas").content == "After"
+        self.search.index_note.assert_called_once()
+
+    def test_save_note_with_new_parent_is_not_skipped(self):
+        """Test that an explicit parent change is saved even if content matches."""
+        self.service.save_note(UpdateNoteRequest(note_id="ideas", content="Same text"))
+        self.search.reset_mock()
+
+        self.service.save_note(
+            UpdateNoteRequest(note_id="ideas", content="Same text", parent_id="projects")
+        )
+
+        assert self.storage.get_note("ideas").parent_id == "projects"
+        self.search.index_note.assert_called_once()
+
+    def test_write_note_defers_indexing(self):
+        """Test that write_note persists without touching the indexes."""
+        record, changed = self.service.write_note(
+            UpdateNoteRequest(note_id="ideas", content="Draft")
+        )
+
+        assert changed is True
+        assert self.storage.get_note("ideas").content == "Draft"
+        self.search.index_note.assert_not_called()
+
+        self.service.reindex_note(record.id)
+
+        self.search.index_note.assert_called_once()
+        self.glossary.update_for_note.assert_called_once_with("ideas")
+
+    def test_reindex_note_uses_latest_content(self):
+        """Test that a deferred reindex indexes whatever is stored now."""
+        self.service.write_note(UpdateNoteRequest(note_id="ideas", content="Old"))
+        self.service.write_note(UpdateNoteRequest(note_id="ideas", content="New"))
+
+        self.service.reindex_note("ideas")
+
+        indexed = self.search.index_note.call_args[0][0]
+        assert indexed.content == "New"
+
+    def test_rename_item_rekeys_renamed_notes_without_rebuilding(self):
+        """Test that a folder rename re-keys only the notes whose ids changed."""
+        self.storage.create_folder("drafts")
+        self.service.save_note(
+            UpdateNoteRequest(note_id="drafts/ideas", content="Body", parent_id="drafts")
+        )
+        self.service.save_note(UpdateNoteRequest(note_id="other", content="Elsewhere"))
+        self.search.reset_mock()
+        self.context.reset_mock()
+        self.glossary.reset_mock()
+
+        new_root = self.service.rename_item("drafts", "notes")
+
+        assert new_root == "notes"
+        self.search.rebuild.assert_not_called()
+        self.context.rebuild.assert_not_called()
+        self.glossary.rebuild.assert_not_called()
+        old_id, record = self.search.rename_note.call_args[0]
+        assert (old_id, record.id, record.content) == ("drafts/ideas", "notes/ideas", "Body")
+        self.context.rename_note.assert_called_once_with("drafts/ideas", record)
+        self.glossary.delete_notes.assert_called_once()
+        self.glossary.update_for_note.assert_called_once_with("notes/ideas")
+
+
+class TestSearchService:
+    """Test suite for SearchService result merging."""
+
+    def setup_method(self):
+        """Set up a SearchService over mocked pipeline components."""
+        self.chunker = Mock()
+        self.embedder = Mock()
+        self.indexer = Mock()
+        self.embedder.embed_batch.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+        self.embedder.get_embedding_dim.return_value = 2
+        self.indexer.get_note_embeddings.return_value = {}
+        self.indexer.get_note_chunks.return_value = []
+        self.indexer.get_all_embeddings.return_value = {}
+        self.service = SearchService(
+            chunker=self.chunker, embedder=self.embedder, indexer=self.indexer
+        )
+
+    @staticmethod
+    def _match(chunk_id, score):
+        return {"note_id": "other", "chunk_id": chunk_id, "excerpt": chunk_id, "score": score}
+
+    def test_search_merges_duplicate_hits_and_keeps_top_ten(self):
+        """Test that hits are deduplicated by best score and truncated in order."""
+        self.chunker.chunk.return_value = [{"text": "one"}, {"text": "two"}, {"text": "three"}]
+        self.indexer.search_batch.return_value = [
+            [self._match(f"c{i}", i / 10) for i in range(5)],
+            [self._match(f"c{i}", i / 10) for i in range(5, 10)],
+            [self._match("c0", 0.95), self._match("c10", 0.05), self._match("c11", 1.5)],
+        ]
+
+        hits = self.service.search(SearchRequest(text="query", note_id="current"))
+
+        assert len(hits) == 10
+        assert [h.chunk_id for h in hits[:2]] == ["c11", "c0"]
+        assert hits[1].score == 0.95
+        assert [h.score for h in hits] == sorted((h.score for h in hits), reverse=True)
+        assert "c10" not in {h.chunk_id for h in hits}
+        self.embedder.embed_batch.assert_called_once_with(["one", "two", "three"])
+        self.indexer.search_batch.assert_called_once()
+
+    def test_search_many_embeds_once_and_queries_once_per_note(self):
+        """Test that batched searches share one embed call and split results back."""
+        self.chunker.chunk.side_effect = lambda text, note_id: [
+            {"text": part} for part in text.split()
+        ]
+        self.indexer.search_batch.side_effect = lambda embeddings, exclude_note_id, top_k: [
+            [self._match(f"{exclude_note_id}-{i}", 0.5)] for i in range(len(embeddings))
+        ]
+        requests = [
+            SearchRequest(text="a b", note_id="n1"),
+            SearchRequest(text="  ", note_id="n2"),
+            SearchRequest(text="c", note_id="n1"),
+            SearchRequest(text="d", note_id="n3"),
+        ]
+
+        results = self.service.search_many(requests)
+
+        self.embedder.embed_batch.assert_called_once_with(["a", "b", "c", "d"])
+        assert self.indexer.search_batch.call_count == 2
+        assert [[h.chunk_id for h in hits] for hits in results] == [
+            ["n1-0", "n1-1"],
+            [],
+            ["n1-2"],
+            ["n3-0"],
+        ]
+
+    def test_repeated_query_chunks_are_served_from_cache(self):
+        """Test that only query chunks missing from the LRU reach the embedder."""
+        self.chunker.chunk.side_effect = lambda text, note_id: [
+            {"text": part} for part in text.split()
+        ]
+        self.indexer.search_batch.side_effect = lambda embeddings, exclude_note_id, top_k: [
+            [] for _ in embeddings
+        ]
+
+        self.service.search(SearchRequest(text="a b", note_id="n1"))
+        self.service.search(SearchRequest(text="b c", note_id="n1"))
+        self.embedder.model_name = "other-model"
+        self.service.search(SearchRequest(text="c", note_id="n1"))
+
+        assert [c.args[0] for c in self.embedder.embed_batch.call_args_list] == [
+            ["a", "b"],
+            ["c"],
+            ["c"],
+        ]
+
+    def test_index_note_embeds_all_chunks_in_one_batch(self):
+        """Test that a note's chunks are embedded with a single batch call."""
+        self.chunker.chunk.return_value = [
+            {"chunk_id": "ideas:0", "text": "one"},
+            {"chunk_id": "ideas:1", "text": "two"},
+        ]
+        record = NoteRecord(id="ideas", title="ideas", kind=NoteKind.NOTE, content="one two")
+
+        assert self.service.index_note(record) == 2
+
+        self.embedder.embed_batch.assert_called_once_with(["one", "two"])
+        note_id, chunk_embeddings = self.indexer.update_note.call_args[0]
+        assert note_id == "ideas"
+        assert [c["chunk_id"] for c in chunk_embeddings] == ["ideas:0", "ideas:1"]
+
+    def test_index_note_accepts_plain_string_kind(self):
+        """Test that a record built with kind="note" is indexed like an enum kind."""
+        self.chunker.chunk.return_value = [{"chunk_id": "ideas:0", "text": "one"}]
+        record = NoteRecord(id="ideas", title="ideas", kind="note", content="one")
+
+        assert record.kind is NoteKind.NOTE
+        assert self.service.index_note(record) == 1
+
+    def test_index_note_reuses_embeddings_of_unchanged_chunks(self):
+        """Test that only chunks whose text changed are sent to the embedder."""
+        self.indexer.get_note_embeddings.return_value = {
+            "kept": [0.5, 0.5],
+            "old": [0.9, 0.1],
+            "stale model": [0.1, 0.2, 0.3],
+        }
+        self.chunker.chunk.return_value = [
+            {"chunk_id": "ideas:0", "text": "kept"},
+            {"chunk_id": "ideas:1", "text": "new"},
+            {"chunk_id": "ideas:2", "text": "stale model"},
+        ]
+        record = NoteRecord(id="ideas", title="ideas", kind=NoteKind.NOTE, content="...")
+
+        self.service.index_note(record)
+
+        self.embedder.embed_batch.assert_called_once_with(["new", "stale model"])
+        _, chunk_embeddings = self.indexer.update_note.call_args[0]
+        assert [c["embedding"] for c in chunk_embeddings] == [
+            [0.5, 0.5],
+            [0.1, 0.2],
+            [0.1, 0.2],
+        ]
+
+    def test_index_note_skips_content_already_indexed(self):
+        """Test that content matching the indexed content key is not re-chunked."""
+        self.embedder.model_name = "test-model"
+        self.chunker.chunk.return_value = [{"chunk_id": "ideas:0", "text": "one"}]
+        record = NoteRecord(id="ideas", title="ideas", kind=NoteKind.NOTE, content="one")
+
+        self.service.index_note(record)
+        stored = self.indexer.update_note.call_args[0][1]
+        self.indexer.get_note_chunks.return_value = stored
+        self.indexer.reset_mock()
+        self.chunker.reset_mock()
+
+        assert self.service.index_note(record) == 1
+        self.chunker.chunk.assert_not_called()
+        self.indexer.update_note.assert_not_called()
+
+        record.content = "one, edited"
+        self.service.index_note(record)
+        self.indexer.update_note.assert_called_once()
+
+    def test_rename_note_moves_entries_with_stored_vectors(self):
+        """Test that renaming re-chunks under the new id and reuses old vectors."""
+        self.embedder.model_name = "test-model"
+        self.indexer.get_note_embeddings.return_value = {"one": [0.7, 0.3]}
+        self.chunker.chunk.return_value = [{"chunk_id": "new_0", "text": "one"}]
+        record = NoteRecord(id="new", title="new", kind=NoteKind.NOTE, content="one")
+
+        assert self.service.rename_note("old", record) == 1
+
+        self.indexer.get_note_embeddings.assert_called_once_with("old", model="test-model")
+        self.embedder.embed_batch.assert_not_called()
+        self.indexer.delete_note.assert_called_once_with("old")
+        note_id, chunk_embeddings = self.indexer.update_note.call_args[0]
+        assert note_id == "new"
+        assert chunk_embeddings[0]["embedding"] == [0.7, 0.3]
+
+    def test_rebuild_batches_embeddings_across_notes(self, monkeypatch):
+        """Test that rebuild embeds chunks from several notes per batch call."""
+        monkeypatch.setenv("GRIMOIRE_EMBED_BATCH_SIZE", "3")
+        self.chunker.chunk.side_effect = lambda text, note_id: [
+            {"chunk_id": f"{note_id}:{i}", "text": f"{note_id}-{i}"} for i in range(2)
+        ]
+        records = [
+            NoteRecord(id=note_id, title=note_id, kind=NoteKind.NOTE, content="text")
+            for note_id in ("a", "b")
+        ]
+        records.append(NoteRecord(id="empty", title="empty", kind=NoteKind.NOTE, content=" "))
+
+        assert self.service.rebuild(records) == 2
+
+        self.indexer.clear.assert_called_once()
+        batches = [call[0][0] for call in self.embedder.embed_batch.call_args_list]
+        assert batches == [["a-0", "a-1", "b-0"], ["b-1"]]
+        updated = {call[0][0]: call[0][1] for call in self.indexer.update_note.call_args_list}
+        assert [c["chunk_id"] for c in updated["b"]] == ["b:0", "b:1"]
+
+    def test_rebuild_reuses_embeddings_of_indexed_text(self, monkeypatch):
+        """Test that rebuild only embeds chunk text the index does not already hold."""
+        monkeypatch.setenv("GRIMOIRE_EMBED_BATCH_SIZE", "8")
+        self.embedder.model_name = "test-model"
+        self.indexer.get_all_embeddings.return_value = {"a-0": [0.3, 0.4], "b-1": [0.5, 0.6]}
+        self.chunker.chunk.side_effect = lambda text, note_id: [
+            {"chunk_id": f"{note_id}:{i}", "text": f"{note_id}-{i}"} for i in range(2)
+        ]
+        records = [
+            NoteRecord(id=note_id, title=note_id, kind=NoteKind.NOTE, content="text")
+            for note_id in ("a", "b")
+        ]
+
+        assert self.service.rebuild(records) == 2
+
+        self.indexer.get_all_embeddings.assert_called_once_with(model="test-model")
+        self.embedder.embed_batch.assert_called_once_with(["a-1", "b-0"])
+        updated = {call[0][0]: call[0][1] for call in self.indexer.update_note.call_args_list}
+        assert [c["embedding"] for c in updated["a"]] == [[0.3, 0.4], [0.1, 0.2]]
+        assert {c["model"] for c in updated["b"]} == {"test-model"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
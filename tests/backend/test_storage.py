@@ -0,0 +1,169 @@
+"""
+Unit tests for the NoteStorage module.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import storage
+from models import NoteKind
+from storage import NoteStorage
+
+
+class TestNoteStorage:
+    """Test suite for NoteStorage record caching."""
+
+    def setup_method(self):
+        """Set up storage over a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.notes_dir = Path(self.temp_dir) / "notes"
+        self.storage = NoteStorage(root=self.notes_dir)
+
+    def teardown_method(self):
+        """Clean up temporary storage."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_records_are_read_from_disk_once(self):
+        """Test that repeated reads are served from the in-memory records."""
+        self.storage.save_note_content("projects/alpha", "Alpha", None)
+        self.storage.save_note_content("projects/beta", "Beta", None)
+
+        with patch.object(storage, "read_json", wraps=storage.read_json) as reads:
+            self.storage.get_tree()
+            first_pass = reads.call_count
+            self.storage.get_tree()
+            self.storage.get_note("projects/alpha")
+            self.storage.list_records()
+
+        assert first_pass == 0
+        assert reads.call_count == first_pass
+
+    def test_cold_start_uses_snapshot_for_unchanged_files(self):
+        """Test that a reopened store only parses files changed since the snapshot."""
+        self.storage.save_note_content("alpha", "Alpha", None)
+        self.storage.save_note_content("beta", "Beta", None)
+        NoteStorage(root=self.notes_dir).list_records()
+
+        with open(self.notes_dir / "beta.json", "r+", encoding="utf-8") as handle:
+            text = handle.read().replace('"Beta"', '"Beta (edited elsewhere)"')
+            handle.seek(0)
+            handle.write(text)
+            handle.truncate()
+
+        reopened = NoteStorage(root=self.notes_dir)
+        with patch.object(storage, "read_json", wraps=storage.read_json) as reads:
+            records = reopened.list_records()
+
+        assert [call.args[0] for call in reads.call_args_list] == [
+            str(self.notes_dir / "beta.json")
+        ]
+        assert records["alpha"].content == "Alpha"
+        assert records["beta"].content == "Beta (edited elsewhere)"
+
+    def test_save_only_rewrites_changed_records(self):
+        """Test that saving one note does not rewrite unrelated records."""
+        self.storage.save_note_content("alpha", "Alpha", None)
+        self.storage.save_note_content("beta", "Beta", None)
+
+        with patch.object(storage, "write_json", wraps=storage.write_json) as writes:
+            self.storage.save_note_content("alpha", "Alpha v2", None)
+
+        written = [call.args[0].name for call in writes.call_args_list]
+        assert written == ["alpha.json.tmp"]
+        assert NoteStorage(root=self.notes_dir).get_note("alpha").content == "Alpha v2"
+
+    def test_writes_are_atomic_and_fsyncs_are_batched(self):
+        """Test that notes are swapped into place and synced once per batch."""
+        store = NoteStorage(root=self.notes_dir, sync_delay=60)
+
+        with patch.object(storage.os, "fsync") as fsync:
+            store.save_note_content("alpha", "Alpha", None)
+            store.save_note_content("alpha", "Alpha v2", None)
+            store.save_note_content("beta", "Beta", None)
+            assert fsync.call_count == 0
+
+            store.sync()
+            synced_files = fsync.call_count
+            store.sync()
+
+        assert synced_files == 3  # alpha, beta, then the directory once
+        assert fsync.call_count == synced_files
+        assert not list(self.notes_dir.glob("*.tmp"))
+        assert NoteStorage(root=self.notes_dir).get_note("alpha").content == "Alpha v2"
+
+    def test_returned_records_do_not_alias_cache(self):
+        """Test that mutating a returned record does not change stored state."""
+        self.storage.create_folder("projects")
+        self.storage.save_note_content("projects/alpha", "Alpha", None)
+
+        folder = self.storage.get_note("projects")
+        folder.children.append("bogus")
+        folder.title = "Changed"
+
+        stored = self.storage.get_note("projects")
+        assert stored.kind == NoteKind.FOLDER
+        assert stored.title == "projects"
+        assert stored.children == ["projects/alpha"]
+
+    def test_delete_and_rename_keep_cache_in_sync(self):
+        """Test that delete and rename are reflected without reloading."""
+        self.storage.create_folder("projects")
+        self.storage.save_note_content("projects/alpha", "Alpha", None)
+        self.storage.save_note_content("scratch", "Scratch", None)
+
+        self.storage.delete_item("scratch")
+        self.storage.rename_item("projects", "work")
+
+        ids = set(self.storage.list_records())
+        assert ids == {"work", "work/alpha"}
+        assert ids == set(NoteStorage(root=self.notes_dir).list_records())
+        with pytest.raises(FileNotFoundError):
+            self.storage.get_note("scratch")
+
+    def test_structural_edits_only_rewrite_affected_records(self):
+        """Test that rename, move, and delete leave unrelated note files alone."""
+        self.storage.create_folder("projects")
+        self.storage.save_note_content("projects/alpha", "Alpha", None)
+        self.storage.save_note_content("scratch", "Scratch", None)
+        self.storage.save_note_content("other", "Other", None)
+        untouched = self.notes_dir / "other.json"
+        before = untouched.stat().st_mtime_ns
+        os.utime(untouched, ns=(before - 10**9, before - 10**9))
+        before = untouched.stat().st_mtime_ns
+
+        self.storage.rename_item("projects", "work")
+        self.storage.move_item("scratch", "work")
+        self.storage.delete_item("work/alpha")
+
+        assert untouched.stat().st_mtime_ns == before
+        assert self.storage.get_note("work").children == ["scratch"]
+        assert self.storage.get_note("scratch").parent_id == "work"
+        assert set(self.storage.list_records()) == set(
+            NoteStorage(root=self.notes_dir).list_records()
+        )
+
+    def test_cold_start_reads_many_files_in_parallel(self):
+        """Test that a cold scan over many changed files loads every record."""
+        for i in range(storage._PARALLEL_READ_MIN + 5):
+            self.storage.save_note_content(f"note-{i}", f"Body {i}", None)
+        (self.notes_dir / "broken.json").write_text("{not json", encoding="utf-8")
+        (self.notes_dir / storage._SNAPSHOT_NAME).unlink(missing_ok=True)
+
+        with patch.object(storage, "ThreadPoolExecutor", wraps=storage.ThreadPoolExecutor) as pool:
+            records = NoteStorage(root=self.notes_dir).list_records()
+
+        pool.assert_called_once()
+        assert len(records) == storage._PARALLEL_READ_MIN + 5
+        assert records["note-7"].content == "Body 7"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])